@@ -0,0 +1,57 @@
+"""event player score aggregates
+
+Revision ID: 0002_event_player_scores
+Revises: 0001_initial
+Create Date: 2026-10-18 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_event_player_scores"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+BACKFILL = """
+INSERT INTO event_player_scores
+    (event_id, user_id, score_sum, vote_count, completed_score_sum, completed_vote_count)
+SELECT
+    p.event_id,
+    p.user_id,
+    COALESCE(SUM(v.score), 0),
+    COUNT(v.id),
+    COALESCE(SUM(CASE WHEN c.voter_id IS NOT NULL THEN v.score END), 0),
+    COUNT(c.voter_id)
+FROM event_participants p
+LEFT JOIN votes v ON v.event_id = p.event_id AND v.target_user_id = p.user_id
+LEFT JOIN (
+    SELECT cv.event_id, cv.voter_id
+    FROM votes cv
+    JOIN event_participants cp ON cp.event_id = cv.event_id AND cp.user_id = cv.voter_id
+    GROUP BY cv.event_id, cv.voter_id
+    HAVING COUNT(*) = (
+        SELECT COUNT(*) FROM event_participants ep WHERE ep.event_id = cv.event_id
+    ) - 1
+) c ON c.event_id = v.event_id AND c.voter_id = v.voter_id
+GROUP BY p.event_id, p.user_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_player_scores",
+        sa.Column("event_id", sa.String(length=36), sa.ForeignKey("events.id"), primary_key=True),
+        sa.Column("user_id", sa.String(length=36), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("score_sum", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("vote_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("completed_score_sum", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("completed_vote_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_table("event_player_scores")
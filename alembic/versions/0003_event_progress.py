@@ -0,0 +1,62 @@
+"""event and voter progress counters
+
+Revision ID: 0003_event_progress
+Revises: 0002_event_player_scores
+Create Date: 2026-10-18 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_event_progress"
+down_revision = "0002_event_player_scores"
+branch_labels = None
+depends_on = None
+
+
+VOTER_BACKFILL = """
+INSERT INTO event_voter_progress (event_id, voter_id, vote_count, completed)
+SELECT
+    p.event_id,
+    p.user_id,
+    COUNT(v.id),
+    CASE WHEN COUNT(v.id) > 0 AND COUNT(v.id) = (
+        SELECT COUNT(*) FROM event_participants ep WHERE ep.event_id = p.event_id
+    ) - 1 THEN TRUE ELSE FALSE END
+FROM event_participants p
+LEFT JOIN votes v ON v.event_id = p.event_id AND v.voter_id = p.user_id
+GROUP BY p.event_id, p.user_id
+"""
+
+EVENT_BACKFILL = """
+INSERT INTO event_progress (event_id, participant_count, completed_voters)
+SELECT
+    e.id,
+    (SELECT COUNT(*) FROM event_participants p WHERE p.event_id = e.id),
+    (SELECT COUNT(*) FROM event_voter_progress vp WHERE vp.event_id = e.id AND vp.completed = TRUE)
+FROM events e
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_voter_progress",
+        sa.Column("event_id", sa.String(length=36), sa.ForeignKey("events.id"), primary_key=True),
+        sa.Column("voter_id", sa.String(length=36), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("vote_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("completed", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.create_table(
+        "event_progress",
+        sa.Column("event_id", sa.String(length=36), sa.ForeignKey("events.id"), primary_key=True),
+        sa.Column("participant_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("completed_voters", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.execute(VOTER_BACKFILL)
+    op.execute(EVENT_BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_table("event_progress")
+    op.drop_table("event_voter_progress")
@@ -0,0 +1,25 @@
+"""event vote version
+
+Revision ID: 0004_event_vote_version
+Revises: 0003_event_progress
+Create Date: 2026-10-18 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_event_vote_version"
+down_revision = "0003_event_progress"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("event_progress") as batch_op:
+        batch_op.add_column(sa.Column("vote_version", sa.Integer(), nullable=False, server_default=sa.text("0")))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("event_progress") as batch_op:
+        batch_op.drop_column("vote_version")
@@ -0,0 +1,23 @@
+"""keyset pagination indexes
+
+Revision ID: 0006_keyset_indexes
+Revises: 0005_user_token_version
+Create Date: 2026-10-18 00:00:00
+"""
+
+from alembic import op
+
+
+revision = "0006_keyset_indexes"
+down_revision = "0005_user_token_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_events_date_id", "events", ["date", "id"])
+    # Usernames are unique, so the unique username index already orders (username, id) pages.
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_date_id", table_name="events")
@@ -0,0 +1,29 @@
+"""composite indexes for vote and participant hot paths
+
+Revision ID: 0007_hot_path_indexes
+Revises: 0006_keyset_indexes
+Create Date: 2026-10-18 00:00:00
+"""
+
+from alembic import op
+
+
+revision = "0007_hot_path_indexes"
+down_revision = "0006_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_votes_event_target_score", "votes", ["event_id", "target_user_id", "score", "voter_id"]
+    )
+    op.create_index("ix_event_participants_user_event", "event_participants", ["user_id", "event_id"])
+    # uq_vote (event_id, voter_id, target_user_id) already serves lookups by event_id.
+    op.drop_index("ix_votes_event_id", table_name="votes")
+
+
+def downgrade() -> None:
+    op.create_index("ix_votes_event_id", "votes", ["event_id"])
+    op.drop_index("ix_event_participants_user_event", table_name="event_participants")
+    op.drop_index("ix_votes_event_target_score", table_name="votes")
@@ -0,0 +1,27 @@
+"""app meta
+
+Revision ID: 0008_app_meta
+Revises: 0007_hot_path_indexes
+Create Date: 2026-10-18 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_app_meta"
+down_revision = "0007_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "app_meta",
+        sa.Column("key", sa.String(length=50), primary_key=True),
+        sa.Column("value", sa.String(length=128), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("app_meta")
@@ -0,0 +1,36 @@
+"""generated teams
+
+Revision ID: 0009_generated_teams
+Revises: 0008_app_meta
+Create Date: 2026-10-18 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_generated_teams"
+down_revision = "0008_app_meta"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "generated_teams",
+        sa.Column("event_id", sa.String(length=36), sa.ForeignKey("events.id"), primary_key=True),
+        sa.Column("vote_version", sa.Integer(), nullable=False),
+        sa.Column("mode", sa.String(length=20), nullable=False),
+        sa.Column("team_count", sa.Integer(), nullable=False),
+        sa.Column("restarts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("seed", sa.Integer(), nullable=True),
+        sa.Column("alternatives", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("objective", sa.Float(), nullable=False),
+        sa.Column("partition", sa.JSON(), nullable=False),
+        sa.Column("response", sa.JSON(), nullable=False),
+        sa.Column("generated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("generated_teams")
@@ -0,0 +1,225 @@
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from .models import EventParticipant, EventPlayerScore, EventProgress, EventVoterProgress, User, Vote
+from .teams import PlayerScore
+
+
+def _voter_counts(db: Session, event_id: str, participant_ids: list[str]) -> dict[str, int]:
+    if not participant_ids:
+        return {}
+    rows = db.execute(
+        select(Vote.voter_id, func.count().label("vote_count"))
+        .where(Vote.event_id == event_id)
+        .where(Vote.voter_id.in_(participant_ids))
+        .group_by(Vote.voter_id)
+    ).all()
+    return {row.voter_id: row.vote_count for row in rows}
+
+
+def rebuild_event_aggregates(db: Session, event_id: str) -> None:
+    """Recompute the event's progress counters and score aggregates from its votes and roster.
+
+    The event's ``vote_version`` is carried over and bumped, like it is for every new vote.
+    """
+    participant_ids = db.scalars(
+        select(EventParticipant.user_id).where(EventParticipant.event_id == event_id)
+    ).all()
+    counts = _voter_counts(db, event_id, participant_ids)
+    required = len(participant_ids) - 1
+    completed = {voter_id for voter_id, count in counts.items() if required > 0 and count == required}
+
+    totals = {user_id: [0, 0, 0, 0] for user_id in participant_ids}
+    if participant_ids:
+        votes = db.execute(
+            select(Vote.voter_id, Vote.target_user_id, Vote.score)
+            .where(Vote.event_id == event_id)
+            .where(Vote.target_user_id.in_(participant_ids))
+        ).all()
+        for vote in votes:
+            row = totals[vote.target_user_id]
+            row[0] += vote.score
+            row[1] += 1
+            if vote.voter_id in completed:
+                row[2] += vote.score
+                row[3] += 1
+
+    version = db.scalar(select(EventProgress.vote_version).where(EventProgress.event_id == event_id)) or 0
+    for model in (EventPlayerScore, EventVoterProgress, EventProgress):
+        db.execute(delete(model).where(model.event_id == event_id))
+    db.execute(
+        insert(EventProgress),
+        [
+            {
+                "event_id": event_id,
+                "participant_count": len(participant_ids),
+                "completed_voters": len(completed),
+                "vote_version": version + 1,
+            }
+        ],
+    )
+    if not participant_ids:
+        return
+    db.execute(
+        insert(EventVoterProgress),
+        [
+            {
+                "event_id": event_id,
+                "voter_id": user_id,
+                "vote_count": counts.get(user_id, 0),
+                "completed": user_id in completed,
+            }
+            for user_id in participant_ids
+        ],
+    )
+    db.execute(
+        insert(EventPlayerScore),
+        [
+            {
+                "event_id": event_id,
+                "user_id": user_id,
+                "score_sum": score_sum,
+                "vote_count": vote_count,
+                "completed_score_sum": completed_sum,
+                "completed_vote_count": completed_count,
+            }
+            for user_id, (score_sum, vote_count, completed_sum, completed_count) in totals.items()
+        ],
+    )
+
+
+def record_votes(db: Session, event_id: str, voter_id: str, scores: dict[str, int], participant_count: int) -> None:
+    """Fold a voter's freshly inserted votes (target id -> score) into the counters and aggregates.
+
+    Runs in the caller's transaction. When the votes bring the voter to a full ballot, the voter
+    is marked completed and all of their votes start counting towards the completed totals of
+    their targets.
+    """
+    if not scores:
+        return
+    table = EventPlayerScore.__table__
+    db.execute(
+        update(table)
+        .where(table.c.event_id == event_id)
+        .where(table.c.user_id == bindparam("target_id"))
+        .values(
+            score_sum=table.c.score_sum + bindparam("score"),
+            vote_count=table.c.vote_count + 1,
+        ),
+        [{"target_id": target_id, "score": score} for target_id, score in scores.items()],
+    )
+    voter_filter = (EventVoterProgress.event_id == event_id) & (EventVoterProgress.voter_id == voter_id)
+    db.execute(
+        update(EventVoterProgress)
+        .where(voter_filter)
+        .values(vote_count=EventVoterProgress.vote_count + len(scores))
+    )
+    voter_votes = db.scalar(select(EventVoterProgress.vote_count).where(voter_filter))
+    completes_voter = voter_votes == participant_count - 1
+    db.execute(
+        update(EventProgress)
+        .where(EventProgress.event_id == event_id)
+        .values(
+            completed_voters=EventProgress.completed_voters + int(completes_voter),
+            vote_version=EventProgress.vote_version + 1,
+        )
+    )
+    if completes_voter:
+        db.execute(update(EventVoterProgress).where(voter_filter).values(completed=True))
+        _add_completed_voter(db, event_id, voter_id)
+
+
+
+def record_score_changes(db: Session, event_id: str, voter_id: str, deltas: dict[str, int]) -> None:
+    """Fold re-scored votes of one voter (target id -> new score minus old score) into the aggregates.
+
+    Vote counts and completion are unchanged by a re-score; only the score sums move, and the
+    completed sums only if the voter already completed their ballot.
+    """
+    deltas = {target_id: delta for target_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    completed = db.scalar(
+        select(EventVoterProgress.completed)
+        .where(EventVoterProgress.event_id == event_id)
+        .where(EventVoterProgress.voter_id == voter_id)
+    )
+    table = EventPlayerScore.__table__
+    values = {"score_sum": table.c.score_sum + bindparam("delta")}
+    if completed:
+        values["completed_score_sum"] = table.c.completed_score_sum + bindparam("delta")
+    db.execute(
+        update(table)
+        .where(table.c.event_id == event_id)
+        .where(table.c.user_id == bindparam("target_id"))
+        .values(**values),
+        [{"target_id": target_id, "delta": delta} for target_id, delta in deltas.items()],
+    )
+    db.execute(
+        update(EventProgress)
+        .where(EventProgress.event_id == event_id)
+        .values(vote_version=EventProgress.vote_version + 1)
+    )
+
+
+def event_progress(db: Session, event_id: str) -> EventProgress | None:
+    return db.scalar(select(EventProgress).where(EventProgress.event_id == event_id))
+
+
+def completed_voter_ids(db: Session, event_id: str) -> list[str]:
+    return db.scalars(
+        select(EventVoterProgress.voter_id)
+        .where(EventVoterProgress.event_id == event_id)
+        .where(EventVoterProgress.completed.is_(True))
+    ).all()
+
+
+def _add_completed_voter(db: Session, event_id: str, voter_id: str) -> None:
+    voter_score = (
+        select(Vote.score)
+        .where(Vote.event_id == EventPlayerScore.event_id)
+        .where(Vote.voter_id == voter_id)
+        .where(Vote.target_user_id == EventPlayerScore.user_id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(EventPlayerScore)
+        .where(EventPlayerScore.event_id == event_id)
+        .where(
+            EventPlayerScore.user_id.in_(
+                select(Vote.target_user_id).where(Vote.event_id == event_id).where(Vote.voter_id == voter_id)
+            )
+        )
+        .values(
+            completed_score_sum=EventPlayerScore.completed_score_sum + voter_score,
+            completed_vote_count=EventPlayerScore.completed_vote_count + 1,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def completed_scores(db: Session, event_id: str, completed: list[str]) -> list[PlayerScore]:
+    """Average score per completed player, counting only votes from completed voters."""
+    rows = db.execute(
+        select(
+            User.id,
+            User.username,
+            User.gender,
+            EventPlayerScore.completed_score_sum,
+            EventPlayerScore.completed_vote_count,
+        )
+        .join(EventPlayerScore, EventPlayerScore.user_id == User.id)
+        .where(EventPlayerScore.event_id == event_id)
+        .where(EventPlayerScore.user_id.in_(completed))
+        .where(EventPlayerScore.completed_vote_count > 0)
+        .order_by(User.username)
+    ).all()
+    return [
+        PlayerScore(
+            user_id=row.id,
+            username=row.username,
+            gender=row.gender,
+            average_score=row.completed_score_sum / row.completed_vote_count,
+        )
+        for row in rows
+    ]
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """Small thread-safe LRU map; the least recently used entry is evicted past ``maxsize``.
+
+    With ``ttl`` (seconds), entries also expire that long after they were set.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name, str(default))
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return default
+
+
+# Scores and teams keyed by event, vote version, completed voters and query parameters.
+result_cache = LRUCache(env_int("RESULT_CACHE_SIZE", 256))
+
+
+def make_etag(key: tuple) -> str:
+    digest = hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {value.strip() for value in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
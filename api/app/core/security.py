@@ -4,10 +4,11 @@ from datetime import datetime, timedelta, timezone
 import jwt
 
 
-def create_access_token(subject: str, expires_minutes: int = 60 * 24) -> str:
+def create_access_token(subject: str, expires_minutes: int = 60 * 24, claims: dict | None = None) -> str:
     secret = os.getenv("JWT_SECRET", "dev-secret")
     now = datetime.now(timezone.utc)
     payload = {
+        **(claims or {}),
         "sub": subject,
         "exp": now + timedelta(minutes=expires_minutes),
         "iat": now,
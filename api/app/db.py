@@ -1,24 +1,328 @@
+import logging
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+import time
+from functools import lru_cache
+from threading import Lock
 
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql.dml import UpdateBase
 
-def get_database_url() -> str:
-    url = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+logger = logging.getLogger(__name__)
+
+POOL_PROFILES = ("queue", "null", "pgbouncer")
+SQLITE_PROFILES = ("default", "wal")
+
+
+def _with_driver(url: str) -> str:
     if url.startswith("postgresql://"):
         return url.replace("postgresql://", "postgresql+psycopg://", 1)
     return url
 
 
-def _connect_args(database_url: str) -> dict:
-    if database_url.startswith("sqlite"):
-        return {"check_same_thread": False}
-    return {}
+def _raw_database_url() -> str:
+    return _with_driver(os.getenv("DATABASE_URL", "sqlite:///./app.db"))
+
+
+def _connect_url(raw_url: str) -> str:
+    # ``?pgbouncer=true`` (as handed out by hosted poolers) selects the pgbouncer profile
+    # and is not a driver option, so it is dropped before connecting.
+    url = make_url(raw_url)
+    return url.difference_update_query(["pgbouncer"]).render_as_string(hide_password=False)
+
+
+def get_database_url() -> str:
+    return _connect_url(_raw_database_url())
+
+
+def get_replica_database_url() -> str | None:
+    """``DATABASE_REPLICA_URL``: a read replica of ``DATABASE_URL`` for read-only routes, if any."""
+    url = os.getenv("DATABASE_REPLICA_URL")
+    return _connect_url(_with_driver(url)) if url else None
+
+
+def use_async_db() -> bool:
+    return os.getenv("DATABASE_ASYNC", "false").lower() == "true"
+
+
+def _async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    return url
+
+
+def get_async_database_url() -> str:
+    """``DATABASE_URL`` with an async driver: aiosqlite for SQLite, psycopg's async mode for Postgres.
+
+    URLs that already name a driver (``postgresql+asyncpg://``) are used as given.
+    """
+    return _async_url(get_database_url())
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+def get_pool_profile() -> str:
+    """Connection pooling profile for Postgres.
+
+    ``DB_POOL_PROFILE`` picks one explicitly. Otherwise a ``pgbouncer=true`` URL uses
+    ``pgbouncer``, a Vercel deployment (``VERCEL`` set) uses ``null`` so short-lived instances
+    hold no idle connections, and anything else keeps a regular ``queue`` pool.
+    """
+    profile = os.getenv("DB_POOL_PROFILE", "").lower()
+    if profile in POOL_PROFILES:
+        return profile
+    if make_url(_raw_database_url()).query.get("pgbouncer") == "true":
+        return "pgbouncer"
+    if os.getenv("VERCEL"):
+        return "null"
+    return "queue"
+
+
+def get_sqlite_profile() -> str:
+    """``DB_SQLITE_PROFILE=wal`` tunes a file-backed SQLite database for concurrent writers.
+
+    ``default`` keeps SQLite's own settings (rollback journal, full sync).
+    """
+    profile = os.getenv("DB_SQLITE_PROFILE", "").lower()
+    return profile if profile in SQLITE_PROFILES else "default"
+
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    """Per-connection pragmas of the ``wal`` profile.
+
+    WAL lets readers run alongside the single writer, and ``synchronous=NORMAL`` only syncs
+    at checkpoints, which is durable against application crashes (not power loss) in WAL mode.
+    Writers that find the database locked wait up to ``busy_timeout`` ms instead of failing.
+    """
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": _env_int("DB_SQLITE_BUSY_TIMEOUT", 5000),
+        # Negative sizes are in KiB rather than pages.
+        "cache_size": -_env_int("DB_SQLITE_CACHE_KB", 16384),
+        "mmap_size": _env_int("DB_SQLITE_MMAP_BYTES", 128 * 1024 * 1024),
+        "temp_store": "MEMORY",
+    }
+
+
+class SQLiteMaintenance:
+    """Applies the ``wal`` pragmas to new connections and runs periodic upkeep.
+
+    At most every ``DB_SQLITE_MAINTENANCE_INTERVAL`` seconds, a connection being returned to
+    the pool (so outside any transaction) runs ``PRAGMA optimize`` to refresh planner
+    statistics and a passive WAL checkpoint, which never waits on readers or writers.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.interval = _env_int("DB_SQLITE_MAINTENANCE_INTERVAL", 300)
+        self.last_run = time.monotonic()
+        self.runs = 0
+
+    def track(self, engine: Engine) -> None:
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        if dbapi_connection is None or time.monotonic() - self.last_run < self.interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self.last_run = time.monotonic()
+            self.run(dbapi_connection)
+        except Exception:
+            # Upkeep is best effort; the next interval tries again.
+            logger.warning("SQLite maintenance failed", exc_info=True)
+        finally:
+            self._lock.release()
 
+    def run(self, dbapi_connection) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA optimize")
+        cursor.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        cursor.close()
+        self.runs += 1
 
-engine = create_engine(get_database_url(), connect_args=_connect_args(get_database_url()), future=True)
+
+def _configure_engine(engine: Engine) -> None:
+    connection_metrics.track(engine)
+    if engine.dialect.name == "sqlite" and get_sqlite_profile() == "wal":
+        sqlite_maintenance.track(engine)
+
+
+def _engine_options(database_url: str) -> dict:
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}} if url.get_driver_name() == "pysqlite" else {}
+
+    profile = get_pool_profile()
+    if profile == "queue":
+        return {
+            "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+            "pool_size": _env_int("DB_POOL_SIZE", 5),
+            "max_overflow": _env_int("DB_MAX_OVERFLOW", 5),
+            "pool_recycle": _env_int("DB_POOL_RECYCLE", 300),
+        }
+    options: dict = {"poolclass": NullPool}
+    if profile == "pgbouncer":
+        # Transaction pooling hands each transaction a different server connection, so
+        # server-side prepared statements would not be found on the next one.
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        else:
+            options["connect_args"] = {"prepare_threshold": None}
+    return options
+
+
+class ConnectionMetrics:
+    """Counts DBAPI connections opened, closed and checked out across the app's engines."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.opened = 0
+        self.closed = 0
+        self.checked_out = 0
+
+    def track(self, engine: Engine) -> None:
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "close_detached", self._on_close)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _bump(self, name: str, delta: int) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self._bump("opened", 1)
+
+    def _on_close(self, dbapi_connection, *args) -> None:
+        self._bump("closed", 1)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self._bump("checked_out", 1)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        self._bump("checked_out", -1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "profile": get_pool_profile(),
+                "opened": self.opened,
+                "closed": self.closed,
+                "open": self.opened - self.closed,
+                "checked_out": self.checked_out,
+            }
+
+
+class ReadSession(Session):
+    """Session for read-only routes: queries go to ``replica`` until the session writes.
+
+    Flushes and ``INSERT``/``UPDATE``/``DELETE`` statements always go to the primary, and so
+    does everything after them, so a route that occasionally writes reads its own changes.
+    Setting ``info["use_primary"]`` up front keeps the whole session on the primary.
+    """
+
+    def __init__(self, *args, replica: Engine | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if isinstance(clause, UpdateBase):
+            self.info["use_primary"] = True
+        if self.replica is None or self.info.get("use_primary"):
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        return self.replica
+
+
+@event.listens_for(ReadSession, "before_flush")
+def _flush_to_primary(session: ReadSession, flush_context, instances) -> None:
+    session.info["use_primary"] = True
+
+
+connection_metrics = ConnectionMetrics()
+sqlite_maintenance = SQLiteMaintenance()
+
+engine = create_engine(get_database_url(), future=True, **_engine_options(get_database_url()))
+_configure_engine(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+replica_engine = None
+if get_replica_database_url():
+    replica_engine = create_engine(
+        get_replica_database_url(), future=True, **_engine_options(get_replica_database_url())
+    )
+    _configure_engine(replica_engine)
+ReadSessionLocal = sessionmaker(
+    bind=engine, class_=ReadSession, replica=replica_engine, autoflush=False, autocommit=False, future=True
+)
+
+
+@lru_cache(maxsize=1)
+def _async_engines():
+    # Imported lazily so the async drivers are only needed when DATABASE_ASYNC is on.
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engines = []
+    for url in (get_database_url(), get_replica_database_url()):
+        if url is None:
+            engines.append(None)
+            continue
+        async_engine = create_async_engine(_async_url(url), **_engine_options(_async_url(url)))
+        _configure_engine(async_engine.sync_engine)
+        engines.append(async_engine)
+    return tuple(engines)
+
+
+@lru_cache(maxsize=1)
+def get_async_sessionmaker():
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    # Handlers return ORM objects that are serialized after the session's greenlet has
+    # finished, where expired attributes could no longer be loaded.
+    return async_sessionmaker(bind=_async_engines()[0], autoflush=False, expire_on_commit=False)
+
+
+@lru_cache(maxsize=1)
+def get_async_read_sessionmaker():
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    primary, replica = _async_engines()
+    return async_sessionmaker(
+        bind=primary,
+        sync_session_class=ReadSession,
+        replica=replica.sync_engine if replica is not None else None,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def dialect_insert(db: Session, table):
+    """``INSERT`` for ``db``'s dialect with ``ON CONFLICT`` support, or ``None`` if it has none."""
+    name = db.get_bind().dialect.name
+    if name == "sqlite":
+        return sqlite.insert(table)
+    if name == "postgresql":
+        return postgresql.insert(table)
+    return None
+
 
 class Base(DeclarativeBase):
     pass
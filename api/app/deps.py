@@ -1,32 +1,234 @@
-from fastapi import Depends, HTTPException, status
+import functools
+import inspect
+import time
+from typing import Any, Callable
+
+from fastapi import Depends, HTTPException, Query, Request, Response, status
+from fastapi.params import Depends as DependsParam
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
+from .cache import env_int
 from .core.security import decode_access_token
-from .db import SessionLocal
+from .db import (
+    ReadSessionLocal,
+    SessionLocal,
+    get_async_read_sessionmaker,
+    get_async_sessionmaker,
+    use_async_db,
+)
 from .models import User
+from .principal import (
+    STREAM_SCOPE,
+    WRITE_SCOPE,
+    Principal,
+    current_token_version,
+    is_expired,
+    issue_write_marker,
+    principal_for_user,
+    principal_from_claims,
+    verified_tokens,
+)
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Cookie carrying a signed ``issue_write_marker`` token after a user's write. The client holds
+# it, so read-your-writes works whichever instance serves the next read.
+WRITE_COOKIE = "last_write"
+
+
+def _sticky_seconds() -> int:
+    return env_int("DB_REPLICA_STICKY_SECONDS", 5)
+
 
-def get_db():
+@event.listens_for(Session, "after_commit")
+def _mark_write(session: Session) -> None:
+    user_id = session.info.get("user_id")
+    response = session.info.get("response")
+    if user_id is not None and response is not None:
+        response.set_cookie(
+            WRITE_COOKIE,
+            issue_write_marker(user_id, _sticky_seconds()),
+            max_age=_sticky_seconds(),
+            httponly=True,
+            samesite="lax",
+        )
+
+
+def _wrote_recently(request: Request, user_id: str) -> bool:
+    marker = request.cookies.get(WRITE_COOKIE)
+    if not marker:
+        return False
+    try:
+        payload = decode_access_token(marker)
+    except Exception:
+        return False
+    return (
+        payload.get("scope") == WRITE_SCOPE
+        and payload.get("sub") == user_id
+        and time.time() - payload.get("iat", 0) < _sticky_seconds()
+    )
+
+
+def get_db(response: Response):
     db = SessionLocal()
+    # Commits on this session mark the response, see _mark_write.
+    db.info["response"] = response
     try:
         yield db
     finally:
         db.close()
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_async_db(response: Response):
+    async with get_async_sessionmaker()() as db:
+        db.info["response"] = response
+        yield db
+
+
+# Sync dependencies taking ``db`` and the async variants db_route handlers use instead.
+_ASYNC_DEPENDENCIES: dict[Callable, Callable] = {get_db: get_async_db}
+
+
+def _in_async_session(func: Callable[..., Any]) -> Callable[..., Any]:
+    signature = inspect.signature(func)
+    parameters = []
+    for parameter in signature.parameters.values():
+        default = parameter.default
+        if isinstance(default, DependsParam) and default.dependency in _ASYNC_DEPENDENCIES:
+            parameter = parameter.replace(default=Depends(_ASYNC_DEPENDENCIES[default.dependency]))
+        parameters.append(parameter)
+
+    @functools.wraps(func)
+    async def run(**kwargs):
+        if "db" not in kwargs:
+            # Only its dependencies touch the database.
+            return func(**kwargs)
+        db = kwargs.pop("db")
+        return await db.run_sync(lambda session: func(db=session, **kwargs))
+
+    run.__signature__ = signature.replace(parameters=parameters)
+    return run
+
+
+def db_route(handler: Callable[..., Any]) -> Callable[..., Any]:
+    """Serve a sync handler taking ``db: Session`` from an ``AsyncSession`` when ``DATABASE_ASYNC`` is on.
+
+    The handler body runs through ``AsyncSession.run_sync``: its queries await the async driver
+    on the event loop instead of blocking a threadpool thread for the whole request. Without
+    async mode the handler is registered unchanged.
+    """
+    return _in_async_session(handler) if use_async_db() else handler
+
+
+def db_dependency(dependency: Callable[..., Any]) -> Callable[..., Any]:
+    """Register a sync dependency taking ``db`` so db_route handlers get an async variant of it.
+
+    The variant shares the request's ``AsyncSession``, just as the sync one shares ``get_db``.
+    """
+    _ASYNC_DEPENDENCIES[dependency] = _in_async_session(dependency)
+    return dependency
+
+
+def _verify_token(token: str, db: Session) -> Principal:
     try:
         payload = decode_access_token(token)
         user_id = payload.get("sub")
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
-    if not user_id:
+    if not user_id or "scope" in payload:
+        # Scoped tokens (stream tokens) are not access tokens.
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.get(User, user_id)
-    if not user:
+    principal = principal_from_claims(payload)
+    if principal is None:
+        # Tokens issued before claims were added only name the user.
+        user = db.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        principal = principal_for_user(user, float(payload["exp"]))
+    return principal
+
+
+def _principal_from_token(token: str, db: Session) -> Principal:
+    principal = verified_tokens.get(token)
+    if principal is None or is_expired(principal):
+        principal = _verify_token(token, db)
+        verified_tokens.set(token, principal)
+    return _check_token_version(token, principal, db)
+
+
+def _check_token_version(token: str, principal: Principal, db: Session) -> Principal:
+    version = current_token_version(db, principal.id)
+    if version is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    if version != principal.token_version:
+        verified_tokens.discard(token)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    # Commits on the request's session are this user's writes.
+    db.info["user_id"] = principal.id
+    return principal
+
+
+@db_dependency
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """Caller described by the token claims; only the token version is looked up, and that is cached."""
+    return _principal_from_token(token, db)
+
+
+def _prepare_read_session(db: Session, request: Request, response: Response, current_user: Principal) -> None:
+    db.info["user_id"] = current_user.id
+    db.info["response"] = response
+    if _wrote_recently(request, current_user.id):
+        db.info["use_primary"] = True
+
+
+def get_read_db(request: Request, response: Response, current_user: Principal = Depends(get_current_user)):
+    """Session for read-only routes: the replica (``DATABASE_REPLICA_URL``) when one is configured.
+
+    A caller whose ``last_write`` cookie shows a write within ``DB_REPLICA_STICKY_SECONDS``
+    reads from the primary instead, so their own votes and changes are visible right away.
+    Without a replica this is the primary.
+    """
+    db = ReadSessionLocal()
+    try:
+        _prepare_read_session(db, request, response, current_user)
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(_ASYNC_DEPENDENCIES[get_current_user]),
+):
+    async with get_async_read_sessionmaker()() as db:
+        _prepare_read_session(db, request, response, current_user)
+        yield db
+
+
+_ASYNC_DEPENDENCIES[get_read_db] = get_async_read_db
+
+
+def get_stream_user(
+    event_id: str,
+    token: str | None = Query(None),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """Caller of an event's progress stream, from a ``?token=`` issued by ``issue_stream_token``.
+
+    EventSource cannot send headers, so the token travels in the URL; only short-lived stream
+    tokens for this very event are accepted there, never access tokens.
+    """
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    try:
+        payload = decode_access_token(token)
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
+    principal = principal_from_claims(payload)
+    if principal is None or payload.get("scope") != STREAM_SCOPE or payload.get("event") != event_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return _check_token_version(token, principal, db)
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime, timezone
 from enum import Enum
 from uuid import uuid4
 
-from sqlalchemy import Boolean, Date, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import JSON, Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
@@ -21,6 +21,7 @@ class User(Base):
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
     username: Mapped[str] = mapped_column(String(50), unique=True, index=True, nullable=False)
     gender: Mapped[Gender] = mapped_column(String(1), nullable=False)
+    token_version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
     votes_cast: Mapped[list[Vote]] = relationship(
         "Vote",
@@ -38,6 +39,10 @@ class User(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Keyset pages of /events seek on (date, id) and filter date ranges on it.
+        Index("ix_events_date_id", "date", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
     date: Mapped[date] = mapped_column(Date, nullable=False)
@@ -54,11 +59,14 @@ class Event(Base):
 class Vote(Base):
     __tablename__ = "votes"
     __table_args__ = (
+        # Also serves every (event_id) and (event_id, voter_id) lookup.
         UniqueConstraint("event_id", "voter_id", "target_user_id", name="uq_vote"),
+        # Covers the per-target score scan of rebuild_event_aggregates.
+        Index("ix_votes_event_target_score", "event_id", "target_user_id", "score", "voter_id"),
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
-    event_id: Mapped[str] = mapped_column(String(36), ForeignKey("events.id"), nullable=False, index=True)
+    event_id: Mapped[str] = mapped_column(String(36), ForeignKey("events.id"), nullable=False)
     voter_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False, index=True)
     target_user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False, index=True)
     score: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -70,9 +78,85 @@ class Vote(Base):
 
 class EventParticipant(Base):
     __tablename__ = "event_participants"
+    __table_args__ = (
+        # The primary key leads with event_id; listing a user's events seeks on this one.
+        Index("ix_event_participants_user_event", "user_id", "event_id"),
+    )
 
     event_id: Mapped[str] = mapped_column(String(36), ForeignKey("events.id"), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), primary_key=True)
 
     event: Mapped[Event] = relationship("Event", back_populates="participants")
     user: Mapped[User] = relationship("User")
+
+
+class EventPlayerScore(Base):
+    """Running vote totals per event participant, kept in step with ``votes`` on every insert.
+
+    ``score_sum``/``vote_count`` cover every vote the player received; the ``completed_``
+    columns only count votes from voters who have rated every other participant, which is
+    what scores and teams are computed from.
+    """
+
+    __tablename__ = "event_player_scores"
+
+    event_id: Mapped[str] = mapped_column(String(36), ForeignKey("events.id"), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), primary_key=True)
+    score_sum: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    vote_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    completed_score_sum: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    completed_vote_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class EventVoterProgress(Base):
+    """Votes cast so far by one participant of an event; ``completed`` once they rated everyone."""
+
+    __tablename__ = "event_voter_progress"
+
+    event_id: Mapped[str] = mapped_column(String(36), ForeignKey("events.id"), primary_key=True)
+    voter_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), primary_key=True)
+    vote_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    completed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+
+
+class EventProgress(Base):
+    __tablename__ = "event_progress"
+
+    event_id: Mapped[str] = mapped_column(String(36), ForeignKey("events.id"), primary_key=True)
+    participant_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    completed_voters: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    vote_version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class GeneratedTeams(Base):
+    """Team split pinned by ``POST /teams:generate``; ``GET /teams`` serves it until the next one.
+
+    ``partition`` lists each team's user ids and ``response`` is the rendered ``TeamResponse``,
+    so reads need neither scores nor a solver run. ``seed`` is the one the solver actually used
+    and ``vote_version`` the event's version the split was computed from.
+    """
+
+    __tablename__ = "generated_teams"
+
+    event_id: Mapped[str] = mapped_column(String(36), ForeignKey("events.id"), primary_key=True)
+    vote_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    mode: Mapped[str] = mapped_column(String(20), nullable=False)
+    team_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    restarts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    seed: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    alternatives: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    objective: Mapped[float] = mapped_column(Float, nullable=False)
+    partition: Mapped[list] = mapped_column(JSON, nullable=False)
+    response: Mapped[dict] = mapped_column(JSON, nullable=False)
+    generated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+
+
+class AppMeta(Base):
+    """Small key/value store for deployment state such as the schema fingerprint and seed checksum."""
+
+    __tablename__ = "app_meta"
+
+    key: Mapped[str] = mapped_column(String(50), primary_key=True)
+    value: Mapped[str] = mapped_column(String(128), nullable=False)
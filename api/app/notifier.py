@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from threading import Lock
+from typing import Callable
+
+from .cache import env_int
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressNotifier:
+    """Fans progress payloads out to every stream subscribed to an event.
+
+    Writers publish once per change from any thread; each subscriber owns an asyncio queue on
+    its event loop. A payload equal to the last one published for the event is dropped, so
+    subscribers only ever see changes.
+
+    Writes handled by other instances never publish here, so each subscribed event also gets
+    one watcher task that calls ``poll`` every ``poll_interval`` seconds and publishes what it
+    reads: one database read per event per tick, shared by all of that event's subscribers.
+    """
+
+    def __init__(self, poll_interval: float = 2.0) -> None:
+        self.poll_interval = poll_interval
+        self._lock = Lock()
+        self._subscribers: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._latest: dict[str, dict] = {}
+        self._watchers: dict[str, asyncio.Task] = {}
+
+    def subscribe(
+        self, event_id: str, current: dict, poll: Callable[[], dict | None] | None = None
+    ) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(event_id, set()).add((loop, queue))
+            self._latest.setdefault(event_id, current)
+            if poll is not None and event_id not in self._watchers:
+                self._watchers[event_id] = loop.create_task(self._watch(event_id, poll))
+        return queue
+
+    def unsubscribe(self, event_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(event_id, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(event_id, None)
+                self._latest.pop(event_id, None)
+                watcher = self._watchers.pop(event_id, None)
+                if watcher is not None:
+                    watcher.cancel()
+
+    def publish(self, event_id: str, payload: dict) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(event_id)
+            if not subscribers or self._latest.get(event_id) == payload:
+                return
+            self._latest[event_id] = payload
+            targets = list(subscribers)
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(queue.put_nowait, payload)
+
+    def has_subscribers(self, event_id: str) -> bool:
+        return bool(self._subscribers.get(event_id))
+
+    async def _watch(self, event_id: str, poll: Callable[[], dict | None]) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                # The read blocks, so it runs on a worker thread rather than the event loop.
+                payload = await asyncio.to_thread(poll)
+            except Exception:
+                logger.warning("progress poll failed for event %s", event_id, exc_info=True)
+                continue
+            if payload is not None:
+                self.publish(event_id, payload)
+
+
+progress_notifier = ProgressNotifier(poll_interval=env_int("STREAM_POLL_SECONDS", 2))
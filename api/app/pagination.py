@@ -0,0 +1,44 @@
+from datetime import date
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Date, Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from .utils import decode_cursor, encode_cursor
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _cursor_value(column: InstrumentedAttribute, value: str):
+    return date.fromisoformat(value) if isinstance(column.type, Date) else value
+
+
+def keyset_page(
+    db: Session,
+    stmt: Select,
+    order_by: tuple[InstrumentedAttribute, ...],
+    cursor: str | None,
+    limit: int,
+    response: Response,
+) -> list:
+    """One page of ``stmt`` ordered by the unique key ``order_by``, resuming after ``cursor``.
+
+    The page seeks past the cursor's key instead of skipping rows, so it costs the same at any
+    depth. When more rows follow, the cursor for the next page is sent in ``X-Next-Cursor``.
+    """
+    if cursor is not None:
+        try:
+            values = decode_cursor(cursor, len(order_by))
+            after = [_cursor_value(column, value) for column, value in zip(order_by, values)]
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+        stmt = stmt.where(tuple_(*order_by) > tuple_(*after))
+    rows = db.scalars(stmt.order_by(*order_by).limit(limit + 1)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            *(str(getattr(rows[-1], column.key)) for column in order_by)
+        )
+    return rows
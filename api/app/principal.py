@@ -0,0 +1,122 @@
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from .cache import LRUCache, env_int
+from .core.security import create_access_token
+from .models import Gender, User
+from .utils import is_admin_user
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, as described by the signed claims of its access token."""
+
+    id: str
+    username: str
+    gender: Gender
+    is_admin: bool
+    token_version: int
+    expires_at: float
+
+
+# Verified tokens, so repeated requests skip signature checks and claim parsing.
+verified_tokens = LRUCache(env_int("TOKEN_CACHE_SIZE", 1024))
+# Current token version per user id. Another process sees a revocation or rename
+# once its own entry for that user expires, so after USER_CACHE_TTL at the latest.
+token_versions = LRUCache(env_int("USER_CACHE_SIZE", 1024), ttl=env_int("USER_CACHE_TTL", 60))
+
+
+# Lifetime of stream tokens; they only need to outlive the EventSource handshake.
+STREAM_TOKEN_MINUTES = 1
+STREAM_SCOPE = "stream"
+WRITE_SCOPE = "write"
+
+
+def issue_access_token(user: User) -> str:
+    claims = {
+        "name": user.username,
+        "gender": Gender(user.gender).value,
+        "adm": is_admin_user(user),
+        "ver": user.token_version or 0,
+    }
+    return create_access_token(user.id, claims=claims)
+
+
+def issue_write_marker(user_id: str, lifetime_seconds: int) -> str:
+    """Signed note that ``user_id`` just committed a write, handed back by the client on reads."""
+    return create_access_token(user_id, expires_minutes=lifetime_seconds // 60 + 1, claims={"scope": WRITE_SCOPE})
+
+
+def issue_stream_token(principal: Principal, event_id: str) -> str:
+    """Short-lived token for one event's progress stream.
+
+    EventSource can only authenticate through the URL, where access and proxy logs keep it,
+    so the stream gets this instead of the day-long access token.
+    """
+    claims = {
+        "name": principal.username,
+        "gender": principal.gender.value,
+        "adm": principal.is_admin,
+        "ver": principal.token_version,
+        "scope": STREAM_SCOPE,
+        "event": event_id,
+    }
+    return create_access_token(principal.id, expires_minutes=STREAM_TOKEN_MINUTES, claims=claims)
+
+
+def principal_from_claims(payload: dict) -> Principal | None:
+    """Principal for a token issued with claims; ``None`` for tokens that only carry ``sub``."""
+    try:
+        return Principal(
+            id=payload["sub"],
+            username=payload["name"],
+            gender=Gender(payload["gender"]),
+            is_admin=bool(payload["adm"]),
+            token_version=int(payload["ver"]),
+            expires_at=float(payload["exp"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def principal_for_user(user: User, expires_at: float) -> Principal:
+    return Principal(
+        id=user.id,
+        username=user.username,
+        gender=Gender(user.gender),
+        is_admin=is_admin_user(user),
+        token_version=user.token_version or 0,
+        expires_at=expires_at,
+    )
+
+
+def is_expired(principal: Principal) -> bool:
+    return principal.expires_at <= time.time()
+
+
+def current_token_version(db: Session, user_id: str) -> int | None:
+    """Token version of ``user_id``, or ``None`` if the user no longer exists."""
+    version = token_versions.get(user_id)
+    if version is None:
+        version = db.scalar(select(User.token_version).where(User.id == user_id))
+        if version is not None:
+            token_versions.set(user_id, version)
+    return version
+
+
+def revoke_tokens(db: Session, user_id: str) -> None:
+    """Invalidate every token issued to ``user_id`` so far; the caller commits."""
+    db.execute(update(User).where(User.id == user_id).values(token_version=User.token_version + 1))
+    token_versions.discard(user_id)
+
+
+@event.listens_for(User, "before_update")
+def _bump_token_version_on_rename(mapper, connection, target: User) -> None:
+    # Tokens carry the username, gender and admin flag, so changing either retires them.
+    attrs = inspect(target).attrs
+    if attrs.username.history.has_changes() or attrs.gender.history.has_changes():
+        target.token_version = (target.token_version or 0) + 1
+        token_versions.discard(target.id)
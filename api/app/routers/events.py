@@ -1,46 +1,165 @@
+import asyncio
+import json
 import os
-from datetime import date, datetime
-
-from fastapi import APIRouter, Body, Depends, HTTPException, status
-from sqlalchemy import delete, func, select
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Callable
+from uuid import uuid4
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from ..deps import get_current_user, get_db
-from ..models import Event, EventParticipant, User, Vote
+from ..aggregates import (
+    completed_scores,
+    completed_voter_ids,
+    event_progress,
+    rebuild_event_aggregates,
+    record_score_changes,
+    record_votes,
+)
+from ..cache import etag_matches, make_etag, result_cache
+from ..db import ReadSessionLocal, dialect_insert
+from ..deps import db_dependency, db_route, get_current_user, get_db, get_read_db, get_stream_user
+from ..models import Event, EventParticipant, EventProgress, GeneratedTeams, User, Vote
+from ..notifier import progress_notifier
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from ..principal import STREAM_TOKEN_MINUTES, Principal, issue_stream_token
 from ..schemas import (
+    CastVote,
     EventCreate,
+    EventDashboard,
     EventOut,
     ParticipantsUpdate,
     ScoreOut,
+    SearchStatsOut,
+    TeamAlternative,
     TeamResponse,
+    ProgressOut,
     UserOut,
+    VoteBatchCreate,
+    VoteBatchResult,
     VoteCreate,
+    VoteResult,
+)
+from ..teams import (
+    PlayerScore,
+    TeamMode,
+    generate_alternative_teams,
+    generate_balanced_teams,
+    generate_multi_teams,
+    solve_exact_teams,
 )
-from ..teams import PlayerScore, generate_balanced_teams
-from ..utils import is_admin_user
 
 
 router = APIRouter(prefix="/api/events", tags=["events"])
 
 DEFAULT_EVENT_DATE = date(2025, 12, 25)
+MAX_TEAMS = 16
+MAX_RESTARTS = 512
+MAX_ALTERNATIVES = 20
+# Seeds are stored with the pinned split in a 32-bit integer column.
+MAX_SEED = 2**31 - 1
+STREAM_KEEPALIVE_SECONDS = 15
+TEAM_PARAMS = ("mode", "teams", "restarts", "seed", "alternatives")
+
+
+def _team_key(index: int) -> str:
+    return f"team_{chr(ord('a') + index)}"
+
+
+@dataclass
+class EventAccess:
+    """An event, its participant ids and the caller, as loaded once per request."""
+
+    event: Event
+    participant_ids: list[str]
+    user: Principal
+
+    @property
+    def is_participant(self) -> bool:
+        return self.user.id in self.participant_ids
+
+    def require_participants(self) -> list[str]:
+        if not self.participant_ids:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Participants not configured")
+        return self.participant_ids
+
+
+def _load_event_access(request: Request, db: Session, event_id: str, current_user: Principal) -> EventAccess:
+    """Event and participant ids in a single query, memoized on ``request``; 404 for unknown events."""
+    loaded = getattr(request.state, "event_access", None)
+    if loaded is None:
+        loaded = request.state.event_access = {}
+    if event_id not in loaded:
+        rows = db.execute(
+            select(Event, EventParticipant.user_id)
+            .outerjoin(EventParticipant, EventParticipant.event_id == Event.id)
+            .where(Event.id == event_id)
+        ).all()
+        if not rows:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+        participant_ids = [user_id for _, user_id in rows if user_id is not None]
+        loaded[event_id] = EventAccess(event=rows[0][0], participant_ids=participant_ids, user=current_user)
+    return loaded[event_id]
+
+
+def _ensure_readable(access: EventAccess) -> EventAccess:
+    if not access.user.is_admin and not access.is_participant:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
+    return access
+
+
+@db_dependency
+def event_access(
+    event_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> EventAccess:
+    return _load_event_access(request, db, event_id, current_user)
+
+
+@db_dependency
+def readable_event(
+    event_id: str,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+) -> EventAccess:
+    """The event, for admins and its participants only."""
+    return _ensure_readable(_load_event_access(request, db, event_id, current_user))
 
 
 @router.get("", response_model=list[EventOut])
+@db_route
 def list_events(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    upcoming: bool = Query(False),
+    cursor: str | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    if is_admin_user(current_user):
-        events = db.scalars(select(Event).order_by(Event.date)).all()
-    else:
-        events = db.scalars(
-            select(Event)
-            .join(EventParticipant, EventParticipant.event_id == Event.id)
-            .where(EventParticipant.user_id == current_user.id)
-            .order_by(Event.date)
-        ).all()
-    if not events and is_admin_user(current_user):
+    """Events by date, paged with ``cursor``; ``upcoming`` starts the range at today."""
+    stmt = select(Event)
+    if not current_user.is_admin:
+        stmt = stmt.join(EventParticipant, EventParticipant.event_id == Event.id).where(
+            EventParticipant.user_id == current_user.id
+        )
+    if upcoming:
+        date_from = max(date_from or date.today(), date.today())
+    if date_from is not None:
+        stmt = stmt.where(Event.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Event.date <= date_to)
+    events = keyset_page(db, stmt, (Event.date, Event.id), cursor, limit, response)
+    unfiltered = cursor is None and date_from is None and date_to is None
+    if not events and unfiltered and current_user.is_admin:
         event = Event(date=DEFAULT_EVENT_DATE, weekly_recurrence=True)
         db.add(event)
         db.commit()
@@ -75,12 +194,13 @@ def _ensure_thursday(payload_date: date) -> None:
 
 
 @router.post("", response_model=EventOut, status_code=status.HTTP_201_CREATED)
+@db_route
 def create_event(
     payload: EventCreate | None = Body(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    if not is_admin_user(current_user):
+    if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     payload_date = _parse_date(payload.date) if payload else None
     if payload is None or payload_date is None:
@@ -101,35 +221,27 @@ def create_event(
 
 
 @router.get("/{event_id}", response_model=EventOut)
-def get_event(
-    event_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    event = db.get(Event, event_id)
-    if not event:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-    if not is_admin_user(current_user):
-        participant_ids = _participant_ids(db, event_id, require=False)
-        if current_user.id not in participant_ids:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
-    return event
+@db_route
+def get_event(access: EventAccess = Depends(readable_event)):
+    return access.event
 
 
 @router.post("/{event_id}/votes", status_code=status.HTTP_201_CREATED)
+@db_route
 def create_vote(
     event_id: str,
     payload: VoteCreate,
+    response: Response,
+    upsert: bool = Query(False),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    access: EventAccess = Depends(event_access),
 ):
-    event = db.get(Event, event_id)
-    if not event:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-    if event.date.weekday() != 3:
+    """Cast one vote. With ``upsert``, an existing vote is re-scored (200) instead of rejected (409)."""
+    current_user = access.user
+    if access.event.date.weekday() != 3:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Voting is only allowed on Thursdays")
-    participant_ids = _participant_ids(db, event_id)
-    if current_user.id not in participant_ids:
+    participant_ids = access.require_participants()
+    if not access.is_participant:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not in this event")
     if payload.target_user_id == current_user.id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot vote for yourself")
@@ -138,6 +250,15 @@ def create_vote(
     target = db.get(User, payload.target_user_id)
     if not target:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target user not found")
+    if upsert:
+        outcomes = _upsert_votes(
+            db, event_id, current_user.id, {payload.target_user_id: payload.score}, len(participant_ids)
+        )
+        db.commit()
+        _publish_progress(db, event_id)
+        if outcomes[payload.target_user_id] == "updated":
+            response.status_code = status.HTTP_200_OK
+        return {"status": "ok", "result": outcomes[payload.target_user_id]}
     vote = Vote(
         event_id=event_id,
         voter_id=current_user.id,
@@ -146,11 +267,160 @@ def create_vote(
     )
     db.add(vote)
     try:
-        db.commit()
+        db.flush()
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Vote already exists")
-    return {"status": "ok"}
+    record_votes(db, event_id, current_user.id, {vote.target_user_id: vote.score}, len(participant_ids))
+    db.commit()
+    _publish_progress(db, event_id)
+    return {"status": "ok", "result": "created"}
+
+
+@router.post("/{event_id}/votes:batch", response_model=VoteBatchResult)
+@db_route
+def create_votes_batch(
+    event_id: str,
+    payload: VoteBatchCreate,
+    upsert: bool = Query(False),
+    db: Session = Depends(get_db),
+    access: EventAccess = Depends(event_access),
+):
+    current_user = access.user
+    if access.event.date.weekday() != 3:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Voting is only allowed on Thursdays")
+    participant_ids = set(access.require_participants())
+    if not access.is_participant:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not in this event")
+    already_voted = set(
+        db.scalars(
+            select(Vote.target_user_id).where(Vote.event_id == event_id).where(Vote.voter_id == current_user.id)
+        ).all()
+    )
+
+    results: list[VoteResult] = []
+    accepted: dict[str, int] = {}
+    for item in payload.votes:
+        target_id = item.target_user_id
+        if target_id == current_user.id:
+            results.append(VoteResult(target_user_id=target_id, status="rejected", detail="Cannot vote for yourself"))
+        elif target_id not in participant_ids:
+            results.append(
+                VoteResult(target_user_id=target_id, status="rejected", detail="Target user is not in this event")
+            )
+        elif target_id in accepted or (target_id in already_voted and not upsert):
+            results.append(VoteResult(target_user_id=target_id, status="duplicate", detail="Vote already exists"))
+        else:
+            accepted[target_id] = item.score
+            results.append(VoteResult(target_user_id=target_id, status="created"))
+
+    outcomes = {target_id: "created" for target_id in accepted}
+    if accepted and upsert:
+        outcomes = _upsert_votes(db, event_id, current_user.id, accepted, len(participant_ids))
+    elif accepted:
+        try:
+            db.execute(
+                insert(Vote),
+                [
+                    {"event_id": event_id, "voter_id": current_user.id, "target_user_id": target_id, "score": score}
+                    for target_id, score in accepted.items()
+                ],
+            )
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Vote already exists")
+        record_votes(db, event_id, current_user.id, accepted, len(participant_ids))
+    if accepted:
+        db.commit()
+        _publish_progress(db, event_id)
+    for result in results:
+        if result.status == "created":
+            result.status = outcomes[result.target_user_id]
+    updated = sum(outcome == "updated" for outcome in outcomes.values())
+    return VoteBatchResult(created=len(outcomes) - updated, updated=updated, results=results)
+
+
+def _upsert_votes(
+    db: Session, event_id: str, voter_id: str, scores: dict[str, int], participant_count: int
+) -> dict[str, str]:
+    """Insert or re-score a voter's votes (target id -> score) and keep the aggregates in step.
+
+    On SQLite and Postgres this is one ``INSERT ... ON CONFLICT DO UPDATE``. A returned id equal
+    to the one generated here means the row was created; otherwise an existing vote was updated.
+    Returns ``"created"`` or ``"updated"`` per target.
+    """
+    previous = dict(
+        db.execute(
+            select(Vote.target_user_id, Vote.score)
+            .where(Vote.event_id == event_id)
+            .where(Vote.voter_id == voter_id)
+            .where(Vote.target_user_id.in_(scores))
+            .with_for_update()
+        ).all()
+    )
+    new_ids = {target_id: str(uuid4()) for target_id in scores}
+    insert_stmt = dialect_insert(db, Vote)
+    if insert_stmt is None:
+        for target_id, score in scores.items():
+            if target_id in previous:
+                db.execute(
+                    update(Vote)
+                    .where(Vote.event_id == event_id)
+                    .where(Vote.voter_id == voter_id)
+                    .where(Vote.target_user_id == target_id)
+                    .values(score=score)
+                )
+            else:
+                db.add(
+                    Vote(
+                        id=new_ids[target_id],
+                        event_id=event_id,
+                        voter_id=voter_id,
+                        target_user_id=target_id,
+                        score=score,
+                    )
+                )
+        db.flush()
+        returned = {target_id: new_ids[target_id] for target_id in scores if target_id not in previous}
+    else:
+        insert_stmt = insert_stmt.values(
+            [
+                {
+                    "id": new_ids[target_id],
+                    "event_id": event_id,
+                    "voter_id": voter_id,
+                    "target_user_id": target_id,
+                    "score": score,
+                }
+                for target_id, score in scores.items()
+            ]
+        )
+        returned = dict(
+            db.execute(
+                insert_stmt.on_conflict_do_update(
+                    index_elements=["event_id", "voter_id", "target_user_id"],
+                    set_={"score": insert_stmt.excluded.score},
+                ).returning(Vote.target_user_id, Vote.id)
+            ).all()
+        )
+    outcomes = {
+        target_id: "created" if returned.get(target_id) == new_ids[target_id] else "updated" for target_id in scores
+    }
+    created = {target_id: scores[target_id] for target_id, outcome in outcomes.items() if outcome == "created"}
+    if any(outcome == "updated" and target_id not in previous for target_id, outcome in outcomes.items()):
+        # Another request inserted one of these votes since it was read; recount from the votes.
+        rebuild_event_aggregates(db, event_id)
+        return outcomes
+    # Re-scores go first: if the new votes complete the ballot, record_votes folds every vote of
+    # the voter, at its current score, into the completed sums.
+    record_score_changes(
+        db,
+        event_id,
+        voter_id,
+        {target_id: scores[target_id] - previous[target_id] for target_id in scores if target_id not in created},
+    )
+    record_votes(db, event_id, voter_id, created, participant_count)
+    return outcomes
 
 
 def _min_required_voters() -> int:
@@ -161,85 +431,213 @@ def _min_required_voters() -> int:
         return 12
 
 
-def _participant_ids(db: Session, event_id: str, require: bool = True) -> list[str]:
-    participant_ids = db.scalars(
-        select(EventParticipant.user_id).where(EventParticipant.event_id == event_id)
-    ).all()
-    if require and not participant_ids:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Participants not configured")
-    return participant_ids
+def _solver_time_budget() -> float:
+    value = os.getenv("TEAM_SOLVER_TIME_BUDGET", "3")
+    try:
+        return max(0.1, float(value))
+    except ValueError:
+        return 3.0
 
 
-def _completed_voter_ids(db: Session, event_id: str) -> list[str]:
-    participant_ids = _participant_ids(db, event_id)
-    participant_count = len(participant_ids)
-    if participant_count < 2:
+def _checked_progress(db: Session, event_id: str):
+    progress = event_progress(db, event_id)
+    if progress is None or progress.participant_count == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Participants not configured")
+    if progress.participant_count < 2:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not enough participants")
-    rows = db.execute(
-        select(Vote.voter_id, func.count().label("vote_count"))
-        .where(Vote.event_id == event_id)
-        .where(Vote.voter_id.in_(participant_ids))
-        .group_by(Vote.voter_id)
-    ).all()
-    return [row.voter_id for row in rows if row.vote_count == participant_count - 1]
+    return progress
 
 
-def _ensure_min_completed(db: Session, event_id: str) -> list[str]:
-    completed = _completed_voter_ids(db, event_id)
+def _ensure_min_completed(db: Session, event_id: str) -> tuple[EventProgress, list[str]]:
+    progress = _checked_progress(db, event_id)
+    completed = completed_voter_ids(db, event_id)
     min_required = _min_required_voters()
     if len(completed) < min_required:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Completed voters: {len(completed)}/{min_required}. At least {min_required} completed voters required before computing teams",
         )
-    return completed
+    return progress, sorted(completed)
+
+
+def _cached_result(
+    request: Request,
+    response: Response,
+    key: tuple,
+    compute: Callable[[], Any],
+    deterministic: Callable[[Any], bool] | None = None,
+) -> Any:
+    """Serve ``compute()`` through the result cache, tagged with a strong ETag built from ``key``.
+
+    ``key`` must contain the event's vote version, so a vote or roster change yields a new tag.
+    A fresh result that ``deterministic`` rejects is returned as is, neither cached nor tagged:
+    the same key could produce a different body next time.
+    """
+    not_modified = _not_modified(request, response, key)
+    if not_modified is not None:
+        return not_modified
+    result = result_cache.get(key)
+    if result is None:
+        result = compute()
+        if deterministic is not None and not deterministic(result):
+            del response.headers["ETag"]
+            return result
+        result_cache.set(key, result)
+    return result
+
+
+def _not_modified(request: Request, response: Response, key: tuple) -> Response | None:
+    """A 304 if the client already has ``key``'s version; otherwise tag ``response`` and return ``None``."""
+    etag = make_etag(key)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
+
+def _cached(key: tuple, compute: Callable[[], Any]) -> Any:
+    result = result_cache.get(key)
+    if result is None:
+        result = compute()
+        result_cache.set(key, result)
+    return result
+
+
+def _scores_key(event_id: str, progress: EventProgress, completed: list[str]) -> tuple:
+    return ("scores", event_id, progress.vote_version, tuple(completed))
+
+
+def _teams_key(
+    event_id: str,
+    progress: EventProgress,
+    completed: list[str],
+    mode: TeamMode = TeamMode.HEURISTIC,
+    teams: int = 2,
+    restarts: int = 0,
+    seed: int | None = None,
+    alternatives: int = 0,
+) -> tuple:
+    return ("teams", event_id, progress.vote_version, tuple(completed), mode.value, teams, restarts, seed, alternatives)
+
+
+def _score_outs(players: list[PlayerScore]) -> list[ScoreOut]:
+    return [
+        ScoreOut(
+            user_id=player.user_id,
+            username=player.username,
+            gender=player.gender,
+            average_score=round(player.average_score, 2),
+        )
+        for player in players
+    ]
 
 
 @router.get("/{event_id}/progress")
+@db_route
 def get_progress(
     event_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    access: EventAccess = Depends(readable_event),
 ):
-    event = db.get(Event, event_id)
-    if not event:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-    if not is_admin_user(current_user):
-        participant_ids = _participant_ids(db, event_id, require=False)
-        if current_user.id not in participant_ids:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
-    completed = _completed_voter_ids(db, event_id)
+    return _progress_payload(_checked_progress(db, event_id))
+
+
+def _progress_payload(progress: EventProgress) -> dict:
     min_required = _min_required_voters()
     return {
-        "completed_voters": len(completed),
+        "completed_voters": progress.completed_voters,
         "required_voters": min_required,
-        "can_show_results": len(completed) >= min_required,
+        "can_show_results": progress.completed_voters >= min_required,
     }
 
 
-@router.get("/{event_id}/participants", response_model=list[UserOut])
-def get_participants(
+def _publish_progress(db: Session, event_id: str) -> None:
+    """Push the committed progress of ``event_id`` to its open streams, if there are any."""
+    if not progress_notifier.has_subscribers(event_id):
+        return
+    progress = event_progress(db, event_id)
+    if progress is not None:
+        progress_notifier.publish(event_id, _progress_payload(progress))
+
+
+def _stream_access(
     event_id: str,
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_stream_user),
+) -> dict:
+    _ensure_readable(_load_event_access(request, db, event_id, current_user))
+    return _progress_payload(_checked_progress(db, event_id))
+
+
+def _read_progress_payload(event_id: str) -> dict | None:
+    with ReadSessionLocal() as db:
+        progress = event_progress(db, event_id)
+        return _progress_payload(progress) if progress is not None else None
+
+
+@router.post("/{event_id}/progress/stream-token")
+@db_route
+def create_stream_token(event_id: str, access: EventAccess = Depends(readable_event)):
+    """Short-lived ``token`` for ``/progress/stream``, which EventSource has to pass in the URL."""
+    return {"token": issue_stream_token(access.user, event_id), "expires_in": STREAM_TOKEN_MINUTES * 60}
+
+
+def _sse(payload: dict) -> str:
+    return f"event: progress\ndata: {json.dumps(payload)}\n\n"
+
+
+@router.get("/{event_id}/progress/stream")
+async def stream_progress(
+    event_id: str,
+    request: Request,
+    current: dict = Depends(_stream_access),
 ):
-    event = db.get(Event, event_id)
-    if not event:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-    participant_ids = _participant_ids(db, event_id, require=False)
-    if not is_admin_user(current_user) and current_user.id not in participant_ids:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
-    return db.scalars(select(User).where(User.id.in_(participant_ids)).order_by(User.username)).all()
+    """Server-Sent Events feed of ``/progress``: the current value first, then each change.
+
+    Changes written through this instance arrive at once; those written elsewhere are picked
+    up by the notifier's shared poll of the event within ``STREAM_POLL_SECONDS``.
+    """
+    queue = progress_notifier.subscribe(event_id, current, poll=lambda: _read_progress_payload(event_id))
+
+    async def events():
+        try:
+            yield _sse(current)
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(payload)
+        finally:
+            progress_notifier.unsubscribe(event_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{event_id}/participants", response_model=list[UserOut])
+@db_route
+def get_participants(
+    db: Session = Depends(get_read_db),
+    access: EventAccess = Depends(readable_event),
+):
+    return db.scalars(select(User).where(User.id.in_(access.participant_ids)).order_by(User.username)).all()
 
 
 @router.put("/{event_id}/participants", response_model=list[UserOut])
+@db_route
 def set_participants(
     event_id: str,
     payload: ParticipantsUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    if not is_admin_user(current_user):
+    if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     event = db.get(Event, event_id)
     if not event:
@@ -251,102 +649,243 @@ def set_participants(
     if len(users) != len(unique_ids):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="One or more users not found")
 
-    db.execute(delete(EventParticipant).where(EventParticipant.event_id == event_id))
-    db.add_all([EventParticipant(event_id=event_id, user_id=user.id) for user in users])
+    current_ids = set(
+        db.scalars(select(EventParticipant.user_id).where(EventParticipant.event_id == event_id)).all()
+    )
+    added = [user_id for user_id in unique_ids if user_id not in current_ids]
+    removed = current_ids.difference(unique_ids)
+    if removed:
+        db.execute(
+            delete(EventParticipant)
+            .where(EventParticipant.event_id == event_id)
+            .where(EventParticipant.user_id.in_(removed))
+        )
+        # Votes cast by or for removed players would otherwise still count toward scores.
+        db.execute(
+            delete(Vote)
+            .where(Vote.event_id == event_id)
+            .where(Vote.voter_id.in_(removed) | Vote.target_user_id.in_(removed))
+        )
+    if added:
+        db.execute(insert(EventParticipant), [{"event_id": event_id, "user_id": user_id} for user_id in added])
+    if added or removed:
+        # Pinned teams would leave out new players or keep removed ones.
+        db.execute(delete(GeneratedTeams).where(GeneratedTeams.event_id == event_id))
+    if added or removed or event_progress(db, event_id) is None:
+        # The roster size sets how many votes complete a voter, so every counter may change.
+        rebuild_event_aggregates(db, event_id)
     db.commit()
+    _publish_progress(db, event_id)
     return users
 
 
 @router.get("/{event_id}/scores", response_model=list[ScoreOut])
+@db_route
 def get_scores(
     event_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    access: EventAccess = Depends(readable_event),
 ):
-    event = db.get(Event, event_id)
-    if not event:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-    if not is_admin_user(current_user):
-        participant_ids = _participant_ids(db, event_id, require=False)
-        if current_user.id not in participant_ids:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
-    completed = _ensure_min_completed(db, event_id)
-
-    rows = db.execute(
-        select(
-            User.id,
-            User.username,
-            User.gender,
-            func.avg(Vote.score).label("avg_score"),
-        )
-        .join(Vote, Vote.target_user_id == User.id)
-        .where(Vote.event_id == event_id)
-        .where(User.id.in_(completed))
-        .where(Vote.voter_id.in_(completed))
-        .where(Vote.target_user_id.in_(completed))
-        .group_by(User.id)
-        .order_by(User.username)
-    ).all()
-
-    return [
-        ScoreOut(
-            user_id=row.id,
-            username=row.username,
-            gender=row.gender,
-            average_score=round(float(row.avg_score), 2),
-        )
-        for row in rows
-    ]
+    progress, completed = _ensure_min_completed(db, event_id)
+    key = _scores_key(event_id, progress, completed)
+    return _cached_result(request, response, key, lambda: _score_outs(completed_scores(db, event_id, completed)))
 
 
+# Not a db_route: the solvers are CPU-bound and stay on the threadpool in async mode.
 @router.get("/{event_id}/teams", response_model=TeamResponse)
 def get_teams(
     event_id: str,
+    request: Request,
+    response: Response,
+    mode: TeamMode = Query(TeamMode.HEURISTIC),
+    teams: int = Query(2, ge=2, le=MAX_TEAMS),
+    restarts: int = Query(0, ge=0, le=MAX_RESTARTS),
+    seed: int | None = Query(None, ge=0, le=MAX_SEED),
+    alternatives: int = Query(0, ge=0, le=MAX_ALTERNATIVES),
+    db: Session = Depends(get_read_db),
+    access: EventAccess = Depends(readable_event),
+):
+    """The pinned split from ``teams:generate`` when there is one and no solver option is given.
+
+    Otherwise the teams are solved from the current votes and cached per vote version, unless
+    restarts run without a seed or the solver runs out of time.
+    """
+    if not any(name in request.query_params for name in TEAM_PARAMS):
+        stored = db.get(GeneratedTeams, event_id)
+        if stored is not None:
+            key = ("generated_teams", event_id, stored.vote_version, stored.response["generated_at"])
+            return _not_modified(request, response, key) or stored.response
+
+    progress, completed = _ensure_min_completed(db, event_id)
+    _check_team_params(completed, mode, teams, restarts, alternatives)
+
+    def build() -> TeamResponse:
+        return _build_teams(completed_scores(db, event_id, completed), mode, teams, restarts, seed, alternatives)
+
+    if restarts and seed is None:
+        # Every such request draws its own seed, so its split is neither cached nor tagged.
+        return build()
+    key = _teams_key(event_id, progress, completed, mode, teams, restarts, seed, alternatives)
+    return _cached_result(request, response, key, build, _finished_in_budget)
+
+
+# Not a db_route, for the same reason as get_teams.
+@router.post("/{event_id}/teams:generate", response_model=TeamResponse)
+def generate_teams(
+    event_id: str,
+    mode: TeamMode = Query(TeamMode.HEURISTIC),
+    teams: int = Query(2, ge=2, le=MAX_TEAMS),
+    restarts: int = Query(0, ge=0, le=MAX_RESTARTS),
+    seed: int | None = Query(None, ge=0, le=MAX_SEED),
+    alternatives: int = Query(0, ge=0, le=MAX_ALTERNATIVES),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    access: EventAccess = Depends(event_access),
 ):
-    event = db.get(Event, event_id)
-    if not event:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-    if not is_admin_user(current_user):
-        participant_ids = _participant_ids(db, event_id, require=False)
-        if current_user.id not in participant_ids:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
-    completed = _ensure_min_completed(db, event_id)
+    """Solve the teams from the current votes and pin them for everyone until the next generation."""
+    if not access.user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    progress, completed = _ensure_min_completed(db, event_id)
+    _check_team_params(completed, mode, teams, restarts, alternatives)
+    result = _build_teams(completed_scores(db, event_id, completed), mode, teams, restarts, seed, alternatives)
+    result.vote_version = progress.vote_version
+    result.generated_at = datetime.now(timezone.utc)
+    values = {
+        "vote_version": progress.vote_version,
+        "mode": mode.value,
+        "team_count": teams,
+        "restarts": restarts,
+        # The heuristic draws a seed when none is given; keep the drawn one so the run can be repeated.
+        "seed": result.search.seed if result.search else seed,
+        "alternatives": alternatives,
+        "objective": result.objective,
+        "partition": [[player.user_id for player in team] for team in result.teams],
+        "response": result.model_dump(mode="json"),
+        "generated_at": result.generated_at,
+    }
+    insert_stmt = dialect_insert(db, GeneratedTeams)
+    if insert_stmt is not None:
+        db.execute(
+            insert_stmt.values(event_id=event_id, **values).on_conflict_do_update(
+                index_elements=["event_id"], set_=values
+            )
+        )
+    else:
+        db.merge(GeneratedTeams(event_id=event_id, **values))
+    db.commit()
+    return result
+
+
+def _finished_in_budget(result: TeamResponse) -> bool:
+    """Whether the solver finished before its time budget, so the split does not depend on timing."""
+    if result.mode == TeamMode.EXACT and not result.optimal:
+        return False
+    return not (result.search and result.search.timed_out)
 
-    if len(completed) % 2 != 0:
+
+def _check_team_params(completed: list[str], mode: TeamMode, teams: int, restarts: int, alternatives: int) -> None:
+    if teams == 2 and len(completed) % 2 != 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Completed voter count must be even to split teams evenly",
         )
+    if teams > 2 and mode == TeamMode.EXACT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Exact mode supports two teams only",
+        )
+    if (restarts or alternatives) and (teams > 2 or mode == TeamMode.EXACT):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Restarts and alternatives are only supported for two-team heuristic mode",
+        )
+
+
+# Not a db_route, for the same reason as get_teams.
+@router.get("/{event_id}/dashboard", response_model=EventDashboard)
+def get_dashboard(
+    event_id: str,
+    db: Session = Depends(get_read_db),
+    access: EventAccess = Depends(readable_event),
+):
+    """Everything the vote and teams pages show, in one round trip.
 
+    Participants come back with the caller's own votes in one joined query. Scores and the
+    teams are only included once enough voters have finished. They go through the same cache
+    entries as ``/scores`` and ``/teams``; pinned teams win over the default two-team split.
+    When the split cannot be solved, ``teams_error`` carries the reason instead.
+    """
     rows = db.execute(
-        select(
-            User.id,
-            User.username,
-            User.gender,
-            func.avg(Vote.score).label("avg_score"),
+        select(User, Vote.score)
+        .outerjoin(
+            Vote,
+            (Vote.target_user_id == User.id) & (Vote.event_id == event_id) & (Vote.voter_id == access.user.id),
         )
-        .join(Vote, Vote.target_user_id == User.id)
-        .where(Vote.event_id == event_id)
-        .where(User.id.in_(completed))
-        .where(Vote.voter_id.in_(completed))
-        .where(Vote.target_user_id.in_(completed))
-        .group_by(User.id)
+        .where(User.id.in_(access.participant_ids))
+        .order_by(User.username)
     ).all()
+    dashboard = EventDashboard(
+        event=EventOut.model_validate(access.event, from_attributes=True),
+        participants=[UserOut.model_validate(user, from_attributes=True) for user, _ in rows],
+        my_votes=[CastVote(target_user_id=user.id, score=score) for user, score in rows if score is not None],
+    )
 
-    players = [
-        PlayerScore(
-            user_id=row.id,
-            username=row.username,
-            gender=row.gender,
-            average_score=float(row.avg_score),
-        )
-        for row in rows
-    ]
-
+    progress = event_progress(db, event_id)
+    if progress is None or progress.participant_count < 2:
+        return dashboard
+    dashboard.progress = ProgressOut(**_progress_payload(progress))
+    if not dashboard.progress.can_show_results:
+        return dashboard
+
+    completed = sorted(completed_voter_ids(db, event_id))
+    players: list[PlayerScore] = []
+
+    def load_players() -> list[PlayerScore]:
+        if not players:
+            players.extend(completed_scores(db, event_id, completed))
+        return players
+
+    dashboard.scores = _cached(_scores_key(event_id, progress, completed), lambda: _score_outs(load_players()))
+    stored = db.get(GeneratedTeams, event_id)
+    if stored is not None:
+        dashboard.teams = TeamResponse.model_validate(stored.response)
+    else:
+        try:
+            _check_team_params(completed, TeamMode.HEURISTIC, 2, 0, 0)
+            dashboard.teams = _cached(
+                _teams_key(event_id, progress, completed),
+                lambda: _build_teams(load_players(), TeamMode.HEURISTIC, 2, 0, None, 0),
+            )
+        except HTTPException as exc:
+            # The same message /teams would answer with, so the page can say why there are no teams.
+            dashboard.teams_error = exc.detail
+    return dashboard
+
+
+def _build_teams(
+    players: list[PlayerScore],
+    mode: TeamMode,
+    teams: int,
+    restarts: int,
+    seed: int | None,
+    alternatives: int,
+) -> TeamResponse:
     try:
-        result = generate_balanced_teams(players)
+        alternative_results = []
+        if teams > 2:
+            multi = generate_multi_teams(players, teams)
+            team_lists, objective, optimal, stats = multi.teams, multi.objective, False, None
+        else:
+            if mode == TeamMode.EXACT:
+                result = solve_exact_teams(players, time_budget=_solver_time_budget())
+            else:
+                result = generate_balanced_teams(
+                    players, restarts=restarts, seed=seed, time_budget=_solver_time_budget()
+                )
+            team_lists = [result.team_a, result.team_b]
+            objective, optimal, stats = result.objective, result.optimal, result.stats
+            alternative_results = generate_alternative_teams(players, alternatives) if alternatives else []
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
@@ -362,22 +901,31 @@ def get_teams(
             "gender_counts": gender_counts,
         }
 
-    def to_score_out(player: PlayerScore) -> ScoreOut:
-        return ScoreOut(
-            user_id=player.user_id,
-            username=player.username,
-            gender=player.gender,
-            average_score=round(player.average_score, 2),
-        )
-
-    team_a = [to_score_out(player) for player in result.team_a]
-    team_b = [to_score_out(player) for player in result.team_b]
+    team_outs = [_score_outs(team) for team in team_lists]
 
     return TeamResponse(
-        team_a=team_a,
-        team_b=team_b,
-        summary={
-            "team_a": build_stats(result.team_a),
-            "team_b": build_stats(result.team_b),
-        },
+        team_a=team_outs[0],
+        team_b=team_outs[1],
+        teams=team_outs,
+        summary={_team_key(index): build_stats(team) for index, team in enumerate(team_lists)},
+        mode=mode,
+        objective=round(objective, 4),
+        optimal=optimal,
+        search=SearchStatsOut(
+            restarts=stats.restarts,
+            seed=stats.seed,
+            best_objective=round(stats.best_objective, 4),
+            median_objective=round(stats.median_objective, 4),
+            timed_out=stats.timed_out,
+        )
+        if stats
+        else None,
+        alternatives=[
+            TeamAlternative(
+                team_a=_score_outs(alternative.team_a),
+                team_b=_score_outs(alternative.team_b),
+                objective=round(alternative.objective, 4),
+            )
+            for alternative in alternative_results
+        ],
     )
@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ..deps import get_current_user, get_db
+from ..deps import db_route, get_current_user, get_read_db
 from ..models import User
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
+from ..principal import Principal
 from ..schemas import UserOut
-from ..utils import is_admin_user
 
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 
 @router.get("", response_model=list[UserOut])
-def list_users(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    if not is_admin_user(current_user):
+@db_route
+def list_users(
+    response: Response,
+    cursor: str | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
-    return db.scalars(select(User).order_by(User.username)).all()
+    return keyset_page(db, select(User), (User.username, User.id), cursor, limit, response)
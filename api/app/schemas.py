@@ -1,9 +1,10 @@
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
 from .models import Gender
+from .teams import TeamMode
 
 
 class LoginRequest(BaseModel):
@@ -41,6 +42,22 @@ class VoteCreate(BaseModel):
     score: int = Field(ge=1, le=10)
 
 
+class VoteBatchCreate(BaseModel):
+    votes: list[VoteCreate] = Field(min_length=1, max_length=500)
+
+
+class VoteResult(BaseModel):
+    target_user_id: str
+    status: Literal["created", "updated", "duplicate", "rejected"]
+    detail: Optional[str] = None
+
+
+class VoteBatchResult(BaseModel):
+    created: int
+    updated: int = 0
+    results: list[VoteResult]
+
+
 class ParticipantsUpdate(BaseModel):
     user_ids: list[str]
 
@@ -58,7 +75,51 @@ class TeamStats(BaseModel):
     gender_counts: dict[str, int]
 
 
+class SearchStatsOut(BaseModel):
+    restarts: int
+    seed: int
+    best_objective: float
+    median_objective: float
+    timed_out: bool
+
+
+class TeamAlternative(BaseModel):
+    team_a: list[ScoreOut]
+    team_b: list[ScoreOut]
+    objective: float
+
+
 class TeamResponse(BaseModel):
     team_a: list[ScoreOut]
     team_b: list[ScoreOut]
+    teams: list[list[ScoreOut]] = []
     summary: dict[str, TeamStats]
+    mode: TeamMode = TeamMode.HEURISTIC
+    objective: float = 0.0
+    optimal: bool = False
+    search: SearchStatsOut | None = None
+    alternatives: list[TeamAlternative] = []
+    # Set on teams pinned by POST /teams:generate; absent on splits computed per request.
+    vote_version: int | None = None
+    generated_at: datetime | None = None
+
+
+class ProgressOut(BaseModel):
+    completed_voters: int
+    required_voters: int
+    can_show_results: bool
+
+
+class CastVote(BaseModel):
+    target_user_id: str
+    score: int
+
+
+class EventDashboard(BaseModel):
+    event: EventOut
+    participants: list[UserOut]
+    my_votes: list[CastVote]
+    progress: ProgressOut | None = None
+    scores: list[ScoreOut] | None = None
+    teams: TeamResponse | None = None
+    teams_error: str | None = None
@@ -1,8 +1,11 @@
+import hashlib
 import os
+from uuid import uuid4
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from .db import dialect_insert
 from .models import Gender, User
 
 SEED_USERS: list[tuple[str, Gender]] = [
@@ -24,8 +27,25 @@ SEED_USERS: list[tuple[str, Gender]] = [
 ]
 
 
+def seed_enabled() -> bool:
+    return os.getenv("SEED_USERS", "true").lower() == "true"
+
+
+def seed_checksum() -> str:
+    return hashlib.sha256(repr(SEED_USERS).encode()).hexdigest()[:32]
+
+
 def seed_users(db: Session) -> None:
-    if os.getenv("SEED_USERS", "true").lower() != "true":
+    if not seed_enabled():
+        return
+    insert_stmt = dialect_insert(db, User)
+    if insert_stmt is not None:
+        rows = [
+            {"id": str(uuid4()), "username": username, "gender": gender.value, "token_version": 0}
+            for username, gender in SEED_USERS
+        ]
+        db.execute(insert_stmt.values(rows).on_conflict_do_nothing(index_elements=["username"]))
+        db.commit()
         return
     existing = {user.username for user in db.scalars(select(User)).all()}
     new_users = [
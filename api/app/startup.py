@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+
+from .db import Base, SessionLocal, dialect_insert, engine
+from .models import AppMeta
+from .seed import seed_checksum, seed_enabled, seed_users
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_KEY = "schema_version"
+SEED_KEY = "seed_checksum"
+
+# Timings of the last startup, in milliseconds, with what the schema and seed steps did.
+startup_report: dict = {}
+
+
+def schema_fingerprint() -> str:
+    """Hash of every table, column and index the models declare."""
+    parts = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda table: table.name):
+        columns = [(column.name, str(column.type), column.nullable) for column in table.columns]
+        indexes = sorted((index.name, tuple(column.name for column in index.columns)) for index in table.indexes)
+        parts.append((table.name, columns, indexes))
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _read_meta(db) -> dict[str, str]:
+    try:
+        return dict(db.execute(select(AppMeta.key, AppMeta.value)).all())
+    except DBAPIError:
+        # A database that predates app_meta: treat it as out of date.
+        db.rollback()
+        return {}
+
+
+def _write_meta(db, key: str, value: str) -> None:
+    insert_stmt = dialect_insert(db, AppMeta)
+    if insert_stmt is not None:
+        db.execute(
+            insert_stmt.values(key=key, value=value).on_conflict_do_update(
+                index_elements=["key"], set_={"value": value}
+            )
+        )
+    else:
+        db.merge(AppMeta(key=key, value=value))
+    db.commit()
+
+
+def prepare_database(import_ms: float | None = None) -> dict:
+    """Create tables and seed users only when the stored fingerprints say they are out of date.
+
+    A warm database costs one connection and one small read instead of a reflection round trip
+    per table and a scan of every user.
+    """
+    started = time.perf_counter()
+    report: dict = {"import_ms": import_ms}
+    with SessionLocal() as db:
+        db.connection()
+        report["connect_ms"] = _elapsed_ms(started)
+
+        step = time.perf_counter()
+        meta = _read_meta(db)
+        fingerprint = schema_fingerprint()
+        report["schema"] = "current" if meta.get(SCHEMA_KEY) == fingerprint else "created"
+        if report["schema"] == "created":
+            db.rollback()
+            Base.metadata.create_all(bind=engine)
+            _write_meta(db, SCHEMA_KEY, fingerprint)
+        report["schema_ms"] = _elapsed_ms(step)
+
+        step = time.perf_counter()
+        checksum = seed_checksum()
+        if not seed_enabled():
+            report["seed"] = "disabled"
+        elif meta.get(SEED_KEY) == checksum:
+            report["seed"] = "current"
+        else:
+            seed_users(db)
+            _write_meta(db, SEED_KEY, checksum)
+            report["seed"] = "seeded"
+        report["seed_ms"] = _elapsed_ms(step)
+    report["total_ms"] = _elapsed_ms(started)
+
+    startup_report.clear()
+    startup_report.update(report)
+    logger.info("startup report: %s", report)
+    return report
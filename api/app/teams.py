@@ -1,7 +1,30 @@
-from dataclasses import dataclass
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import lru_cache
+from threading import Lock
+from typing import Any
 
 from .models import Gender
 
+EXACT_MAX_PLAYERS = 40
+VECTORIZED_MIN_PLAYERS = 40
+# Restarts times players below which a search runs in-process: handing smaller jobs to the
+# process pool costs more in pickling and round trips than the starts themselves.
+PARALLEL_MIN_WORK = 2000
+
+
+class TeamMode(str, Enum):
+    HEURISTIC = "heuristic"
+    EXACT = "exact"
+
 
 @dataclass
 class PlayerScore:
@@ -11,10 +34,28 @@ class PlayerScore:
     average_score: float
 
 
+@dataclass
+class SearchStats:
+    restarts: int
+    seed: int
+    best_objective: float
+    median_objective: float
+    timed_out: bool = False
+
+
 @dataclass
 class TeamResult:
     team_a: list[PlayerScore]
     team_b: list[PlayerScore]
+    objective: float = 0.0
+    optimal: bool = False
+    stats: SearchStats | None = None
+
+
+@dataclass
+class MultiTeamResult:
+    teams: list[list[PlayerScore]]
+    objective: float = 0.0
 
 
 def _team_stats(team: list[PlayerScore]) -> dict:
@@ -26,23 +67,210 @@ def _team_stats(team: list[PlayerScore]) -> dict:
     return {"total": total, "avg": avg, "gender_counts": gender_counts}
 
 
+def _score(total_a: float, total_b: float, males_a: int, males_b: int, size_a: int, size_b: int) -> float:
+    return abs(total_a - total_b) + (abs(males_a - males_b) * 2) + (abs(size_a - size_b) * 0.5)
+
+
 def _objective(team_a: list[PlayerScore], team_b: list[PlayerScore]) -> float:
     stats_a = _team_stats(team_a)
     stats_b = _team_stats(team_b)
-    score_diff = abs(stats_a["total"] - stats_b["total"])
-    gender_diff = abs(stats_a["gender_counts"]["M"] - stats_b["gender_counts"]["M"])
-    size_diff = abs(len(team_a) - len(team_b))
-    return score_diff + (gender_diff * 2) + (size_diff * 0.5)
+    return _score(
+        stats_a["total"],
+        stats_b["total"],
+        stats_a["gender_counts"]["M"],
+        stats_b["gender_counts"]["M"],
+        len(team_a),
+        len(team_b),
+    )
+
+
+@dataclass
+class TeamState:
+    """Two teams plus running totals, so placements and swaps are scored in O(1)."""
+
+    team_a: list[PlayerScore] = field(default_factory=list)
+    team_b: list[PlayerScore] = field(default_factory=list)
+    total_a: float = 0.0
+    total_b: float = 0.0
+    males_a: int = 0
+    males_b: int = 0
+
+    def __post_init__(self) -> None:
+        self.resync()
+
+    def resync(self) -> None:
+        self.total_a = sum(p.average_score for p in self.team_a)
+        self.total_b = sum(p.average_score for p in self.team_b)
+        self.males_a = sum(1 for p in self.team_a if p.gender == Gender.M)
+        self.males_b = sum(1 for p in self.team_b if p.gender == Gender.M)
+
+    @property
+    def females_a(self) -> int:
+        return len(self.team_a) - self.males_a
+
+    @property
+    def females_b(self) -> int:
+        return len(self.team_b) - self.males_b
+
+    def objective(self) -> float:
+        return _score(
+            self.total_a, self.total_b, self.males_a, self.males_b, len(self.team_a), len(self.team_b)
+        )
+
+    def add_cost(self, player: PlayerScore, to_a: bool) -> float:
+        male = int(player.gender == Gender.M)
+        if to_a:
+            return _score(
+                self.total_a + player.average_score,
+                self.total_b,
+                self.males_a + male,
+                self.males_b,
+                len(self.team_a) + 1,
+                len(self.team_b),
+            )
+        return _score(
+            self.total_a,
+            self.total_b + player.average_score,
+            self.males_a,
+            self.males_b + male,
+            len(self.team_a),
+            len(self.team_b) + 1,
+        )
+
+    def add(self, player: PlayerScore, to_a: bool) -> None:
+        male = int(player.gender == Gender.M)
+        if to_a:
+            self.team_a.append(player)
+            self.total_a += player.average_score
+            self.males_a += male
+        else:
+            self.team_b.append(player)
+            self.total_b += player.average_score
+            self.males_b += male
+
+    def swap_cost(self, i: int, j: int) -> float:
+        player_a = self.team_a[i]
+        player_b = self.team_b[j]
+        shift = player_b.average_score - player_a.average_score
+        male_shift = int(player_b.gender == Gender.M) - int(player_a.gender == Gender.M)
+        return _score(
+            self.total_a + shift,
+            self.total_b - shift,
+            self.males_a + male_shift,
+            self.males_b - male_shift,
+            len(self.team_a),
+            len(self.team_b),
+        )
+
+    def swap(self, i: int, j: int) -> None:
+        self.team_a[i], self.team_b[j] = self.team_b[j], self.team_a[i]
+        # Recompute from the lists so rounding drift never accumulates across swaps.
+        self.resync()
+
+
+@dataclass
+class MultiTeamState:
+    """K teams with running totals; a cross-team swap is scored from the two teams it touches.
+
+    The objective sums each team's distance from the per-team mean score total, male count and
+    size, with the same weights as ``_objective``; for two teams the two coincide.
+    """
+
+    teams: list[list[PlayerScore]]
+    totals: list[float] = field(default_factory=list)
+    males: list[int] = field(default_factory=list)
+    mean_total: float = 0.0
+    mean_males: float = 0.0
+    mean_size: float = 0.0
 
+    def __post_init__(self) -> None:
+        self.resync()
 
-def generate_balanced_teams(players: list[PlayerScore]) -> TeamResult:
+    def resync(self) -> None:
+        self.totals = [sum(p.average_score for p in team) for team in self.teams]
+        self.males = [sum(1 for p in team if p.gender == Gender.M) for team in self.teams]
+
+    def set_targets(self, players: list[PlayerScore]) -> None:
+        count = len(self.teams)
+        self.mean_total = sum(p.average_score for p in players) / count
+        self.mean_males = sum(1 for p in players if p.gender == Gender.M) / count
+        self.mean_size = len(players) / count
+
+    def _team_cost(self, total: float, males: int, size: int) -> float:
+        return (
+            abs(total - self.mean_total)
+            + (abs(males - self.mean_males) * 2)
+            + (abs(size - self.mean_size) * 0.5)
+        )
+
+    def cost(self, index: int) -> float:
+        return self._team_cost(self.totals[index], self.males[index], len(self.teams[index]))
+
+    def objective(self) -> float:
+        return sum(self.cost(index) for index in range(len(self.teams)))
+
+    def add_delta(self, player: PlayerScore, index: int) -> float:
+        male = int(player.gender == Gender.M)
+        new_cost = self._team_cost(
+            self.totals[index] + player.average_score,
+            self.males[index] + male,
+            len(self.teams[index]) + 1,
+        )
+        return new_cost - self.cost(index)
+
+    def add(self, player: PlayerScore, index: int) -> None:
+        self.teams[index].append(player)
+        self.totals[index] += player.average_score
+        self.males[index] += int(player.gender == Gender.M)
+
+    def swap_delta(self, p: int, i: int, q: int, j: int) -> float:
+        player_p = self.teams[p][i]
+        player_q = self.teams[q][j]
+        shift = player_q.average_score - player_p.average_score
+        male_shift = int(player_q.gender == Gender.M) - int(player_p.gender == Gender.M)
+        before = self.cost(p) + self.cost(q)
+        after = self._team_cost(self.totals[p] + shift, self.males[p] + male_shift, len(self.teams[p])) + (
+            self._team_cost(self.totals[q] - shift, self.males[q] - male_shift, len(self.teams[q]))
+        )
+        return after - before
+
+    def pair_slack(self, p: int, q: int) -> float:
+        """Upper bound on what any swap between teams ``p`` and ``q`` can still gain.
+
+        Swaps keep the pair's combined total and male count, so their joint cost cannot drop
+        below the cost of splitting those as evenly as whole players allow.
+        """
+        males = self.males[p] + self.males[q]
+        floor = abs(self.totals[p] + self.totals[q] - 2 * self.mean_total) + 2 * (
+            abs(males // 2 - self.mean_males) + abs(males - males // 2 - self.mean_males)
+        )
+        current = (
+            abs(self.totals[p] - self.mean_total)
+            + abs(self.totals[q] - self.mean_total)
+            + 2 * (abs(self.males[p] - self.mean_males) + abs(self.males[q] - self.mean_males))
+        )
+        return current - floor
+
+    def swap(self, p: int, i: int, q: int, j: int) -> None:
+        player_p = self.teams[p][i]
+        player_q = self.teams[q][j]
+        self.teams[p][i], self.teams[q][j] = player_q, player_p
+        shift = player_q.average_score - player_p.average_score
+        male_shift = int(player_q.gender == Gender.M) - int(player_p.gender == Gender.M)
+        self.totals[p] += shift
+        self.totals[q] -= shift
+        self.males[p] += male_shift
+        self.males[q] -= male_shift
+
+
+def _validate_roster(players: list[PlayerScore]) -> None:
     if len(players) < 12 or len(players) % 2 != 0:
         raise ValueError("Team generation requires an even number of players (min 12).")
 
-    players_sorted = sorted(players, key=lambda p: p.average_score, reverse=True)
-    team_a: list[PlayerScore] = []
-    team_b: list[PlayerScore] = []
-    team_size = len(players) // 2
+
+def _greedy_split(players_sorted: list[PlayerScore]) -> TeamState:
+    state = TeamState()
+    team_size = len(players_sorted) // 2
 
     total_m = sum(1 for p in players_sorted if p.gender == Gender.M)
     total_f = sum(1 for p in players_sorted if p.gender == Gender.F)
@@ -52,67 +280,534 @@ def generate_balanced_teams(players: list[PlayerScore]) -> TeamResult:
     target_b_f = total_f - target_a_f
 
     for player in players_sorted:
-        if len(team_a) >= team_size:
-            team_b.append(player)
+        if len(state.team_a) >= team_size:
+            state.add(player, to_a=False)
             continue
-        if len(team_b) >= team_size:
-            team_a.append(player)
+        if len(state.team_b) >= team_size:
+            state.add(player, to_a=True)
             continue
 
-        gender = player.gender
-        team_a_gender = {"M": sum(1 for p in team_a if p.gender == Gender.M),
-                         "F": sum(1 for p in team_a if p.gender == Gender.F)}
-        team_b_gender = {"M": sum(1 for p in team_b if p.gender == Gender.M),
-                         "F": sum(1 for p in team_b if p.gender == Gender.F)}
-
-        if gender == Gender.M:
-            if team_a_gender["M"] >= target_a_m and team_b_gender["M"] < target_b_m:
-                team_b.append(player)
+        if player.gender == Gender.M:
+            if state.males_a >= target_a_m and state.males_b < target_b_m:
+                state.add(player, to_a=False)
                 continue
-            if team_b_gender["M"] >= target_b_m and team_a_gender["M"] < target_a_m:
-                team_a.append(player)
+            if state.males_b >= target_b_m and state.males_a < target_a_m:
+                state.add(player, to_a=True)
                 continue
         else:
-            if team_a_gender["F"] >= target_a_f and team_b_gender["F"] < target_b_f:
-                team_b.append(player)
+            if state.females_a >= target_a_f and state.females_b < target_b_f:
+                state.add(player, to_a=False)
                 continue
-            if team_b_gender["F"] >= target_b_f and team_a_gender["F"] < target_a_f:
-                team_a.append(player)
+            if state.females_b >= target_b_f and state.females_a < target_a_f:
+                state.add(player, to_a=True)
                 continue
 
-        candidate_a = team_a + [player]
-        candidate_b = team_b + [player]
-        score_a = _objective(candidate_a, team_b)
-        score_b = _objective(team_a, candidate_b)
+        score_a = state.add_cost(player, to_a=True)
+        score_b = state.add_cost(player, to_a=False)
 
         if score_a < score_b:
-            team_a.append(player)
+            state.add(player, to_a=True)
         elif score_b < score_a:
-            team_b.append(player)
+            state.add(player, to_a=False)
         else:
-            if len(team_a) <= len(team_b):
-                team_a.append(player)
-            else:
-                team_b.append(player)
+            state.add(player, to_a=len(state.team_a) <= len(state.team_b))
+
+    _swap_optimization(state)
+    return state
+
+
+def generate_balanced_teams(
+    players: list[PlayerScore],
+    restarts: int = 0,
+    seed: int | None = None,
+    time_budget: float = 3.0,
+    workers: int | None = None,
+) -> TeamResult:
+    """Greedy split by descending score followed by a swap search.
+
+    With ``restarts`` > 0, that many extra starts from jittered orderings are searched as well,
+    until ``time_budget`` seconds have passed; the split with the lowest objective wins and
+    ``stats`` describes the run. Searches large enough to repay the round trips are spread
+    over ``workers`` processes of a shared pool; smaller ones run in-process.
+    """
+    _validate_roster(players)
+
+    players_sorted = sorted(players, key=lambda p: p.average_score, reverse=True)
+    state = _greedy_split(players_sorted)
+    result = TeamResult(team_a=state.team_a, team_b=state.team_b, objective=state.objective())
+    if restarts <= 0:
+        return result
+    return _multi_start(players, result, restarts, seed, time_budget, workers)
+
+
+def generate_alternative_teams(players: list[PlayerScore], count: int) -> list[TeamResult]:
+    """Return up to ``count`` distinct splits, best objective first.
+
+    A beam search places players strongest first, keeping the ``4 * count + 8`` best partial
+    splits by objective. Player one always starts in team A, so a split and its A/B mirror are
+    never both kept. Each finished split is then polished with the swap search and mirrored
+    splits are merged again, since polishing can move player one across. Unpolished splits stay
+    in the pool so that polishing several starts into one split does not shrink the result.
+    """
+    _validate_roster(players)
+    players_sorted = sorted(players, key=lambda p: p.average_score, reverse=True)
+    team_size = len(players_sorted) // 2
+    beam_width = 4 * count + 8
+    full_mask = (1 << len(players_sorted)) - 1
+
+    first = players_sorted[0]
+    first_male = int(first.gender == Gender.M)
+    # (objective, total_a, total_b, males_a, males_b, size_a, size_b, team A bitmask)
+    beam = [(0.0, first.average_score, 0.0, first_male, 0, 1, 0, 1)]
+    for index, player in enumerate(players_sorted[1:], start=1):
+        bit = 1 << index
+        male = int(player.gender == Gender.M)
+        score = player.average_score
+        children = []
+        for _, total_a, total_b, males_a, males_b, size_a, size_b, mask in beam:
+            if size_a < team_size:
+                children.append((
+                    _score(total_a + score, total_b, males_a + male, males_b, size_a + 1, size_b),
+                    total_a + score, total_b, males_a + male, males_b, size_a + 1, size_b, mask | bit,
+                ))
+            if size_b < team_size:
+                children.append((
+                    _score(total_a, total_b + score, males_a, males_b + male, size_a, size_b + 1),
+                    total_a, total_b + score, males_a, males_b + male, size_a, size_b + 1, mask,
+                ))
+        children.sort(key=lambda child: (child[0], child[7]))
+        beam = children[:beam_width]
+
+    candidates: dict[int, TeamResult] = {}
+    positions = {id(player): index for index, player in enumerate(players_sorted)}
+    for *_, mask in beam:
+        team_a = [p for i, p in enumerate(players_sorted) if mask >> i & 1]
+        team_b = [p for i, p in enumerate(players_sorted) if not mask >> i & 1]
+        candidates.setdefault(mask, TeamResult(team_a=team_a, team_b=team_b))
+        state = TeamState(team_a=team_a[:], team_b=team_b[:])
+        _swap_optimization(state)
+        polished = sum(1 << positions[id(player)] for player in state.team_a)
+        if not polished & 1:
+            polished ^= full_mask
+            state.team_a, state.team_b = state.team_b, state.team_a
+        candidates[polished] = TeamResult(team_a=state.team_a, team_b=state.team_b)
+
+    results = []
+    for mask, result in candidates.items():
+        result.objective = _objective(result.team_a, result.team_b)
+        results.append((result.objective, mask, result))
+    results.sort(key=lambda item: (item[0], item[1]))
+    return [result for _, _, result in results[:count]]
 
-    _swap_optimization(team_a, team_b)
-    return TeamResult(team_a=team_a, team_b=team_b)
 
+def _randomized_start(players: list[PlayerScore], seed: int) -> tuple[float, list[int]]:
+    """Run one jittered greedy start; returns its objective and the indices of team A."""
+    rng = random.Random(seed)
+    order = sorted(
+        range(len(players)),
+        key=lambda index: players[index].average_score + rng.uniform(-1.0, 1.0),
+        reverse=True,
+    )
+    positions = {id(players[index]): index for index in order}
+    state = _greedy_split([players[index] for index in order])
+    return state.objective(), sorted(positions[id(player)] for player in state.team_a)
 
-def _swap_optimization(team_a: list[PlayerScore], team_b: list[PlayerScore]) -> None:
+
+def _randomized_starts(
+    players: list[PlayerScore], seed: int, runs: list[int], deadline: float
+) -> list[tuple[float, int, list[int]]]:
+    """Run a batch of starts in a pool worker, stopping at ``deadline`` (``time.time()``)."""
+    outcomes = []
+    for run in runs:
+        if time.time() > deadline:
+            break
+        objective, team_a = _randomized_start(players, seed + run)
+        outcomes.append((objective, run, team_a))
+    return outcomes
+
+
+_pool_lock = Lock()
+_pool: ProcessPoolExecutor | None = None
+_pool_unavailable = False
+
+
+def _process_pool() -> ProcessPoolExecutor | None:
+    """The process pool shared by all restart searches, created on first use.
+
+    Workers come from a forkserver (or are spawned) rather than forked from the server, which
+    runs threads. ``None`` where the runtime cannot start processes.
+    """
+    global _pool, _pool_unavailable
+    with _pool_lock:
+        if _pool is None and not _pool_unavailable:
+            methods = multiprocessing.get_all_start_methods()
+            try:
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=context)
+            except (OSError, NotImplementedError, ValueError):
+                # Some serverless runtimes lack the shared memory a process pool needs.
+                _pool_unavailable = True
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _multi_start(
+    players: list[PlayerScore],
+    baseline: TeamResult,
+    restarts: int,
+    seed: int | None,
+    time_budget: float,
+    workers: int | None,
+) -> TeamResult:
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**31)
+    deadline = time.monotonic() + time_budget
+    workers = min(workers or os.cpu_count() or 1, restarts)
+    # (objective, restart index, team A indices); the plain greedy start is restart -1.
+    outcomes: list[tuple[float, int, list[int] | None]] = [(baseline.objective, -1, None)]
+    timed_out = False
+
+    pending = list(range(restarts))
+    pool = _process_pool() if workers > 1 and restarts * len(players) >= PARALLEL_MIN_WORK else None
+    if pool is not None:
+        # A few batches per worker balance the load; workers stop starting runs at the
+        # deadline, so a timed-out search does not keep the shared pool busy.
+        batches = [pending[index::workers * 4] for index in range(workers * 4)]
+        wall_deadline = time.time() + time_budget
+        futures = [
+            pool.submit(_randomized_starts, players, seed, batch, wall_deadline) for batch in batches if batch
+        ]
+        try:
+            for future in as_completed(futures, timeout=max(0.0, deadline - time.monotonic()) + 0.5):
+                outcomes.extend(future.result())
+        except FutureTimeoutError:
+            for future in futures:
+                future.cancel()
+        except (BrokenProcessPool, OSError):
+            _discard_pool(pool)
+        done = {run for _, run, _ in outcomes}
+        pending = [run for run in pending if run not in done]
+
+    for run in pending:
+        if time.monotonic() > deadline:
+            timed_out = True
+            break
+        objective, team_a = _randomized_start(players, seed + run)
+        outcomes.append((objective, run, team_a))
+
+    objective, _, team_a_indices = min(outcomes, key=lambda outcome: (outcome[0], outcome[1]))
+    stats = SearchStats(
+        restarts=len(outcomes) - 1,
+        seed=seed,
+        best_objective=objective,
+        median_objective=statistics.median(outcome[0] for outcome in outcomes),
+        timed_out=timed_out,
+    )
+    if team_a_indices is None:
+        baseline.stats = stats
+        return baseline
+    chosen = set(team_a_indices)
+    team_a = [player for index, player in enumerate(players) if index in chosen]
+    team_b = [player for index, player in enumerate(players) if index not in chosen]
+    return TeamResult(team_a=team_a, team_b=team_b, objective=_objective(team_a, team_b), stats=stats)
+
+
+@lru_cache(maxsize=1)
+def _numpy():
+    # Imported on first use rather than with the module, which keeps it out of cold starts.
+    try:
+        import numpy
+    except ImportError:  # numpy is optional; the pure-Python swap search is used without it
+        return None
+    return numpy
+
+
+def _swap_optimization(state: TeamState) -> None:
+    if len(state.team_a) + len(state.team_b) >= VECTORIZED_MIN_PLAYERS and _numpy() is not None:
+        _vectorized_swap_optimization(state)
+    else:
+        _python_swap_optimization(state)
+
+
+def _vectorized_swap_optimization(state: TeamState) -> None:
+    """Apply the best swap from the full swap-delta matrix until none improves by 0.01."""
+    np = _numpy()
+    scores_a = np.array([p.average_score for p in state.team_a], dtype=float)
+    scores_b = np.array([p.average_score for p in state.team_b], dtype=float)
+    males_a = np.array([p.gender == Gender.M for p in state.team_a], dtype=float)
+    males_b = np.array([p.gender == Gender.M for p in state.team_b], dtype=float)
+    size_penalty = abs(len(state.team_a) - len(state.team_b)) * 0.5
+    current_score = state.objective()
+
+    # Every accepted swap lowers the objective by at least 0.01, so this cap is never the
+    # reason the loop ends on sane inputs; it only guards against float noise cycling.
+    for _ in range(len(scores_a) * len(scores_b)):
+        score_gap = scores_a.sum() - scores_b.sum()
+        male_gap = males_a.sum() - males_b.sum()
+        shift = scores_b[None, :] - scores_a[:, None]
+        male_shift = males_b[None, :] - males_a[:, None]
+        swapped = np.abs(score_gap + 2 * shift) + np.abs(male_gap + 2 * male_shift) * 2 + size_penalty
+        i, j = np.unravel_index(np.argmin(swapped), swapped.shape)
+        if swapped[i, j] + 0.01 >= current_score:
+            break
+        scores_a[i], scores_b[j] = scores_b[j], scores_a[i]
+        males_a[i], males_b[j] = males_b[j], males_a[i]
+        state.team_a[i], state.team_b[j] = state.team_b[j], state.team_a[i]
+        current_score = float(swapped[i, j])
+    state.resync()
+
+
+def _python_swap_optimization(state: TeamState) -> None:
     improved = True
     passes = 0
     while improved and passes < 2:
         improved = False
         passes += 1
-        current_score = _objective(team_a, team_b)
-        for i, player_a in enumerate(team_a):
-            for j, player_b in enumerate(team_b):
-                swapped_a = team_a[:]
-                swapped_b = team_b[:]
-                swapped_a[i], swapped_b[j] = player_b, player_a
-                new_score = _objective(swapped_a, swapped_b)
+        current_score = state.objective()
+        for i in range(len(state.team_a)):
+            for j in range(len(state.team_b)):
+                new_score = state.swap_cost(i, j)
                 if new_score + 0.01 < current_score:
-                    team_a[i], team_b[j] = player_b, player_a
+                    state.swap(i, j)
                     current_score = new_score
                     improved = True
+
+
+Groups = dict[tuple[int, int], tuple[Any, Any]]
+
+
+def _half_subsets(half: list[PlayerScore], deadline: float) -> Groups | None:
+    """Every subset of ``half`` as (sums, bitmasks) sorted by sum, keyed by (size, male count).
+
+    Sums and masks are numpy arrays when numpy is available and lists otherwise. Returns
+    ``None`` as soon as ``deadline`` passes; it is checked once per player.
+    """
+    if _numpy() is not None:
+        return _half_subsets_vectorized(half, deadline)
+    groups: dict[tuple[int, int], tuple[list[float], list[int]]] = {(0, 0): ([0.0], [0])}
+    for index, player in enumerate(half):
+        if time.monotonic() > deadline:
+            return None
+        bit = 1 << index
+        male = int(player.gender == Gender.M)
+        score = player.average_score
+        # Largest sizes first, so a group is never extended before it has been read this round.
+        for (size, males), (sums, masks) in sorted(groups.items(), reverse=True):
+            target = groups.setdefault((size + 1, males + male), ([], []))
+            target[0].extend([value + score for value in sums])
+            target[1].extend([mask | bit for mask in masks])
+    for key, (sums, masks) in groups.items():
+        if time.monotonic() > deadline:
+            return None
+        pairs = sorted(zip(sums, masks))
+        groups[key] = ([pair[0] for pair in pairs], [pair[1] for pair in pairs])
+    return groups
+
+
+def _half_subsets_vectorized(half: list[PlayerScore], deadline: float) -> Groups | None:
+    np = _numpy()
+    sums = np.zeros(1)
+    sizes = np.zeros(1, dtype=np.int64)
+    males = np.zeros(1, dtype=np.int64)
+    masks = np.zeros(1, dtype=np.int64)
+    for index, player in enumerate(half):
+        if time.monotonic() > deadline:
+            return None
+        # Each player doubles the subsets: all of them without the player, then all with.
+        sums = np.concatenate([sums, sums + player.average_score])
+        sizes = np.concatenate([sizes, sizes + 1])
+        males = np.concatenate([males, males + int(player.gender == Gender.M)])
+        masks = np.concatenate([masks, masks | (1 << index)])
+    if time.monotonic() > deadline:
+        return None
+    order = np.lexsort((sums, males, sizes))
+    sums, sizes, males, masks = sums[order], sizes[order], males[order], masks[order]
+    bounds = np.flatnonzero((np.diff(sizes) != 0) | (np.diff(males) != 0)) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(sums)]])
+    return {
+        (int(sizes[start]), int(males[start])): (sums[start:end], masks[start:end])
+        for start, end in zip(starts, ends)
+    }
+
+
+def _closest_pair(sums_l, sums_r, wanted_total: float, best_gap: float) -> tuple[float, int, int] | None:
+    """The pair with ``sums_l[i] + sums_r[j]`` closest to ``wanted_total``, if closer than ``best_gap``.
+
+    Both sequences are sorted; returns (gap, i, j).
+    """
+    np = _numpy()
+    if np is not None and not isinstance(sums_l, list):
+        wanted = wanted_total - sums_l
+        pos = np.searchsorted(sums_r, wanted)
+        above = np.minimum(pos, len(sums_r) - 1)
+        below = np.maximum(pos - 1, 0)
+        gap_above = np.abs(sums_r[above] - wanted)
+        gap_below = np.abs(wanted - sums_r[below])
+        gaps = np.minimum(gap_above, gap_below)
+        index_l = int(np.argmin(gaps))
+        if gaps[index_l] >= best_gap:
+            return None
+        index_r = above[index_l] if gap_above[index_l] <= gap_below[index_l] else below[index_l]
+        return float(gaps[index_l]), index_l, int(index_r)
+
+    found = None
+    last = len(sums_r) - 1
+    for index_l, sum_l in enumerate(sums_l):
+        wanted = wanted_total - sum_l
+        pos = bisect_left(sums_r, wanted)
+        if pos <= last and sums_r[pos] - wanted < best_gap:
+            best_gap = sums_r[pos] - wanted
+            found = (best_gap, index_l, pos)
+        if pos and wanted - sums_r[pos - 1] < best_gap:
+            best_gap = wanted - sums_r[pos - 1]
+            found = (best_gap, index_l, pos - 1)
+    return found
+
+
+def solve_exact_teams(players: list[PlayerScore], time_budget: float = 3.0) -> TeamResult:
+    """Minimise ``_objective`` over all equal-size splits by meet-in-the-middle.
+
+    The heuristic split is the starting incumbent. Candidate male counts for team A are tried
+    in order of their gender penalty, which is a lower bound on the objective, so the search
+    stops as soon as that bound reaches the incumbent. If ``time_budget`` seconds run out, or
+    the roster is larger than ``EXACT_MAX_PLAYERS``, the best split found so far is returned
+    with ``optimal=False``.
+    """
+    incumbent = generate_balanced_teams(players)
+    if len(players) > EXACT_MAX_PLAYERS:
+        return incumbent
+    deadline = time.monotonic() + time_budget
+
+    left = players[0::2]
+    right = players[1::2]
+    team_size = len(players) // 2
+    total = sum(p.average_score for p in players)
+    total_m = sum(1 for p in players if p.gender == Gender.M)
+    half_total = total / 2
+
+    left_groups = _half_subsets(left, deadline)
+    right_groups = _half_subsets(right, deadline) if left_groups is not None else None
+    if right_groups is None:
+        return incumbent
+
+    best = incumbent.objective
+    best_masks: tuple[int, int] | None = None
+    candidates = [
+        males_a
+        for males_a in range(total_m + 1)
+        if 0 <= team_size - males_a <= len(players) - total_m
+    ]
+    candidates.sort(key=lambda males_a: abs(2 * males_a - total_m))
+    timed_out = False
+
+    for males_a in candidates:
+        gender_penalty = abs(2 * males_a - total_m) * 2
+        if gender_penalty >= best:
+            break
+        # Half the remaining slack: team A's sum must land within this distance of ``half_total``.
+        best_gap = (best - gender_penalty) / 2
+        for (size_l, males_l), (sums_l, masks_l) in left_groups.items():
+            if best_gap <= 1e-9:
+                break
+            if time.monotonic() > deadline:
+                timed_out = True
+                break
+            group_r = right_groups.get((team_size - size_l, males_a - males_l))
+            if group_r is None:
+                continue
+            sums_r, masks_r = group_r
+            found = _closest_pair(sums_l, sums_r, half_total, best_gap)
+            if found is not None:
+                best_gap, index_l, index_r = found
+                best_masks = (int(masks_l[index_l]), int(masks_r[index_r]))
+        best = min(best, gender_penalty + best_gap * 2)
+        if timed_out:
+            break
+
+    if best_masks is None:
+        incumbent.optimal = not timed_out
+        return incumbent
+
+    mask_l, mask_r = best_masks
+    team_a = [p for i, p in enumerate(left) if mask_l >> i & 1] + [p for i, p in enumerate(right) if mask_r >> i & 1]
+    team_b = [p for i, p in enumerate(left) if not mask_l >> i & 1] + [
+        p for i, p in enumerate(right) if not mask_r >> i & 1
+    ]
+    return TeamResult(
+        team_a=team_a,
+        team_b=team_b,
+        objective=_objective(team_a, team_b),
+        optimal=not timed_out,
+    )
+
+
+def _validate_multi_roster(players: list[PlayerScore], team_count: int) -> None:
+    if team_count < 2:
+        raise ValueError("Team generation requires at least two teams.")
+    if len(players) < 6 * team_count or len(players) % team_count != 0:
+        raise ValueError(
+            f"Splitting into {team_count} teams requires a multiple of {team_count} players "
+            f"(min {6 * team_count})."
+        )
+
+
+def generate_multi_teams(players: list[PlayerScore], team_count: int, max_passes: int = 10) -> MultiTeamResult:
+    """Split ``players`` into ``team_count`` equal teams balanced on score and gender.
+
+    Players are placed strongest first into the team whose cost grows least, subject to the
+    size cap and per-team gender quotas, then cross-team swaps are applied while any of them
+    improves the objective by more than 0.01.
+    """
+    _validate_multi_roster(players, team_count)
+
+    players_sorted = sorted(players, key=lambda p: p.average_score, reverse=True)
+    state = MultiTeamState(teams=[[] for _ in range(team_count)])
+    state.set_targets(players)
+    team_size = len(players) // team_count
+
+    total_m = sum(1 for p in players if p.gender == Gender.M)
+    total_f = len(players) - total_m
+    # The first ``total % team_count`` teams take one extra player of that gender.
+    quota_m = [total_m // team_count + (index < total_m % team_count) for index in range(team_count)]
+    quota_f = [total_f // team_count + (index < total_f % team_count) for index in range(team_count)]
+
+    for player in players_sorted:
+        open_teams = [index for index in range(team_count) if len(state.teams[index]) < team_size]
+        if player.gender == Gender.M:
+            preferred = [index for index in open_teams if state.males[index] < quota_m[index]]
+        else:
+            preferred = [
+                index for index in open_teams if len(state.teams[index]) - state.males[index] < quota_f[index]
+            ]
+        choices = preferred or open_teams
+        best_index = min(choices, key=lambda index: (state.add_delta(player, index), len(state.teams[index]), index))
+        state.add(player, best_index)
+
+    _multi_swap_optimization(state, max_passes)
+    return MultiTeamResult(teams=state.teams, objective=state.objective())
+
+
+def _multi_swap_optimization(state: MultiTeamState, max_passes: int) -> None:
+    team_count = len(state.teams)
+    for _ in range(max_passes):
+        improved = False
+        for p in range(team_count):
+            for q in range(p + 1, team_count):
+                for i in range(len(state.teams[p])):
+                    if state.pair_slack(p, q) <= 0.01:
+                        break
+                    for j in range(len(state.teams[q])):
+                        if state.swap_delta(p, i, q, j) < -0.01:
+                            state.swap(p, i, q, j)
+                            improved = True
+        if not improved:
+            break
+    state.resync()
@@ -0,0 +1,151 @@
+import time
+from collections import Counter, defaultdict
+from threading import Lock
+from typing import Iterable
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from .cache import env_int
+from .models import User
+from .utils import levenshtein, normalize_name
+
+GRAM = 3
+# A miss forces a full rebuild at most this often, so unknown names cannot keep rescanning users.
+FORCED_REBUILD_SECONDS = env_int("USER_INDEX_REBUILD_SECONDS", 30)
+
+
+def _grams(key: str) -> Counter:
+    padded = "\0" * (GRAM - 1) + key + "\0" * (GRAM - 1)
+    return Counter(padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1))
+
+
+class UserNameIndex:
+    """Trigram index over normalized usernames for "closest name within a few edits" lookups.
+
+    Two strings within ``k`` edits share at least ``len(query) + GRAM - 1 - k * GRAM`` padded
+    trigrams (counted with multiplicity), so only users reaching that count are verified with
+    the banded Levenshtein distance. Queries too short for the bound to filter anything fall
+    back to scanning users whose name length is within ``k`` of the query.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        # Renamed or deleted users leave a ``None`` key behind until the next rebuild.
+        self._keys: list[str | None] = []
+        self._user_ids: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._by_length: dict[int, list[int]] = defaultdict(list)
+        self.rebuilt_at = float("-inf")
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def rebuild(self, users: Iterable[tuple[str, str]]) -> None:
+        with self._lock:
+            self._keys = []
+            self._user_ids = []
+            self._positions = {}
+            self._postings = defaultdict(list)
+            self._by_length = defaultdict(list)
+            for user_id, username in users:
+                self._insert(user_id, username)
+            self.rebuilt_at = time.monotonic()
+
+    def add(self, user_id: str, username: str) -> None:
+        """Index ``username`` for ``user_id``, replacing the name it was indexed under before."""
+        with self._lock:
+            position = self._positions.get(user_id)
+            if position is not None:
+                if self._keys[position] == normalize_name(username):
+                    return
+                self._keys[position] = None
+            self._insert(user_id, username)
+
+    def remove(self, user_id: str) -> None:
+        with self._lock:
+            position = self._positions.pop(user_id, None)
+            if position is not None:
+                self._keys[position] = None
+
+    def _insert(self, user_id: str, username: str) -> None:
+        position = len(self._keys)
+        key = normalize_name(username)
+        self._keys.append(key)
+        self._user_ids.append(user_id)
+        self._positions[user_id] = position
+        self._by_length[len(key)].append(position)
+        for gram, count in _grams(key).items():
+            self._postings[gram].append((position, count))
+
+    def _candidates(self, target: str, max_distance: int) -> Iterable[int]:
+        threshold = len(target) + GRAM - 1 - max_distance * GRAM
+        if threshold <= 0:
+            return [
+                position
+                for length in range(len(target) - max_distance, len(target) + max_distance + 1)
+                for position in self._by_length.get(length, ())
+            ]
+        shared: dict[int, int] = defaultdict(int)
+        for gram, query_count in _grams(target).items():
+            for position, count in self._postings.get(gram, ()):
+                shared[position] += min(query_count, count)
+        return [position for position, count in shared.items() if count >= threshold]
+
+    def search(self, username: str, max_distance: int = 2) -> str | None:
+        """Id of the closest user within ``max_distance``; ties go to the earliest indexed user."""
+        target = normalize_name(username)
+        best: tuple[int, int] | None = None
+        with self._lock:
+            for position in self._candidates(target, max_distance):
+                key = self._keys[position]
+                if key is None:
+                    continue
+                distance = levenshtein(target, key, max_distance)
+                if distance <= max_distance and (best is None or (distance, position) < best):
+                    best = (distance, position)
+            return self._user_ids[best[1]] if best else None
+
+
+user_index = UserNameIndex()
+
+
+def find_user_by_name(db: Session, username: str, max_distance: int = 2) -> User | None:
+    """Closest user to ``username`` within ``max_distance`` edits of its normalized form.
+
+    Users written through this process keep the index current via the mapper listeners
+    below. Changes made elsewhere (other instances, bulk inserts) are caught by rebuilding
+    it when the user count no longer matches, and once more before reporting a miss or a
+    match whose current name is no longer close enough, unless the index was rebuilt within
+    the last ``FORCED_REBUILD_SECONDS``.
+    """
+    target = normalize_name(username)
+    for attempt in range(2):
+        if attempt:
+            if time.monotonic() - user_index.rebuilt_at < FORCED_REBUILD_SECONDS:
+                break
+            user_index.rebuild(db.execute(select(User.id, User.username)).all())
+        elif db.scalar(select(func.count()).select_from(User)) != len(user_index):
+            user_index.rebuild(db.execute(select(User.id, User.username)).all())
+        user_id = user_index.search(username, max_distance)
+        user = db.get(User, user_id) if user_id is not None else None
+        if user is not None and levenshtein(target, normalize_name(user.username), max_distance) <= max_distance:
+            return user
+    return None
+
+
+@event.listens_for(User, "after_insert")
+def _index_new_user(mapper, connection, target: User) -> None:
+    user_index.add(target.id, target.username)
+
+
+@event.listens_for(User, "after_update")
+def _reindex_renamed_user(mapper, connection, target: User) -> None:
+    if inspect(target).attrs.username.history.has_changes():
+        user_index.add(target.id, target.username)
+
+
+@event.listens_for(User, "after_delete")
+def _unindex_deleted_user(mapper, connection, target: User) -> None:
+    user_index.remove(target.id)
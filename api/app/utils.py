@@ -1,3 +1,5 @@
+import base64
+import json
 import unicodedata
 
 from .models import User
@@ -9,5 +11,56 @@ def normalize_name(value: str) -> str:
     return "".join(char for char in normalized if not unicodedata.combining(char)).replace(" ", "")
 
 
+def levenshtein(a: str, b: str, max_distance: int | None = None) -> int:
+    """Edit distance between ``a`` and ``b``.
+
+    With ``max_distance``, only the diagonal band of that width is filled in and the computation
+    stops once a whole row exceeds it; any distance above the bound is reported as
+    ``max_distance + 1``.
+    """
+    if a == b:
+        return 0
+    if max_distance is None:
+        max_distance = max(len(a), len(b))
+    limit = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return limit
+    if not a or not b:
+        return max(len(a), len(b))
+
+    prev_row = [j if j <= max_distance else limit for j in range(len(b) + 1)]
+    for i, char_a in enumerate(a, start=1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        row = [limit] * (len(b) + 1)
+        if i <= max_distance:
+            row[0] = i
+        for j in range(low, high + 1):
+            insert_cost = row[j - 1] + 1
+            delete_cost = prev_row[j] + 1
+            replace_cost = prev_row[j - 1] + (char_a != b[j - 1])
+            row[j] = min(insert_cost, delete_cost, replace_cost, limit)
+        if min(row[low - 1:high + 1]) >= limit:
+            return limit
+        prev_row = row
+    return prev_row[-1]
+
+
 def is_admin_user(user: User) -> bool:
     return normalize_name(user.username) == "munevver"
+
+
+def encode_cursor(*values: str) -> str:
+    """Opaque keyset cursor for the last row of a page."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[str]:
+    """Values of a cursor made by ``encode_cursor``; ``ValueError`` if it is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+        raise ValueError("Invalid cursor")
+    return values
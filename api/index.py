@@ -1,9 +1,15 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import time
 
-from api.app.db import Base, SessionLocal, engine
-from api.app.routers import auth, events, users
-from api.app.seed import seed_users
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+
+from api.app.db import connection_metrics  # noqa: E402
+from api.app.routers import auth, events, users  # noqa: E402
+from api.app.startup import prepare_database, startup_report  # noqa: E402
+
+IMPORT_MS = round((time.perf_counter() - _import_started) * 1000, 1)
 
 app = FastAPI(title="Volleyball Team Matcher")
 
@@ -13,13 +19,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 @app.on_event("startup")
 def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
-    with SessionLocal() as db:
-        seed_users(db)
+    prepare_database(import_ms=IMPORT_MS)
+
+
+@app.get("/api/health")
+def health() -> dict:
+    return {"status": "ok", "connections": connection_metrics.snapshot(), "startup": startup_report}
 
 
 app.include_router(auth.router)
@@ -10,6 +10,27 @@ export async function apiRequest<T>(
   options: RequestInit = {},
   token?: string | null
 ): Promise<T> {
+  return (await apiRequestWithHeaders<T>(path, options, token)).data;
+}
+
+export async function apiRequestAllPages<T>(path: string, token?: string | null): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const separator = path.includes("?") ? "&" : "?";
+    const pagePath: string = cursor ? `${path}${separator}cursor=${encodeURIComponent(cursor)}` : path;
+    const page: { data: T[]; headers: Headers } = await apiRequestWithHeaders<T[]>(pagePath, {}, token);
+    items.push(...page.data);
+    cursor = page.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return items;
+}
+
+async function apiRequestWithHeaders<T>(
+  path: string,
+  options: RequestInit = {},
+  token?: string | null
+): Promise<{ data: T; headers: Headers }> {
   const headers = new Headers(options.headers || {});
   if (!headers.has("Content-Type") && options.body) {
     headers.set("Content-Type", "application/json");
@@ -18,7 +39,10 @@ export async function apiRequest<T>(
     headers.set("Authorization", `Bearer ${token}`);
   }
 
+  // The API's last_write cookie keeps reads after a write on the primary; a cross-origin
+  // VITE_API_BASE only sends it back with credentials.
   const response = await fetch(`${API_BASE}${path}`, {
+    credentials: "include",
     ...options,
     headers
   });
@@ -46,5 +70,5 @@ export async function apiRequest<T>(
     throw new Error(String(message));
   }
 
-  return data;
+  return { data: data as T, headers: response.headers };
 }
@@ -1,7 +1,7 @@
 ﻿import { FormEvent, useEffect, useMemo, useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
 
-import { apiRequest } from "../api";
+import { apiRequest, apiRequestAllPages } from "../api";
 import { GenderBadge } from "../components/GenderBadge";
 import { useAuth } from "../context/AuthContext";
 
@@ -41,7 +41,7 @@ export function EventsPage() {
 
     const loadEvents = async () => {
       try {
-        const data = await apiRequest<EventItem[]>("/events", {}, token);
+        const data = await apiRequestAllPages<EventItem>("/events", token);
         setEvents(data);
       } catch (err) {
         setError((err as Error).message);
@@ -50,7 +50,7 @@ export function EventsPage() {
 
     const loadUsers = async () => {
       try {
-        const data = await apiRequest<UserItem[]>("/users", {}, token);
+        const data = await apiRequestAllPages<UserItem>("/users", token);
         setUsers(data);
         const defaults: Record<string, boolean> = {};
         data.forEach((user) => {
@@ -25,10 +25,18 @@ type TeamResponse = {
   summary: { team_a: TeamStats; team_b: TeamStats };
 };
 
+type DashboardResponse = {
+  event: { date: string };
+  progress: { completed_voters: number; required_voters: number } | null;
+  teams: TeamResponse | null;
+  teams_error: string | null;
+};
+
 export function TeamsPage() {
   const { id } = useParams();
-  const { token } = useAuth();
+  const { token, isAdmin } = useAuth();
   const [data, setData] = useState<TeamResponse | null>(null);
+  const [generating, setGenerating] = useState(false);
   const [eventDate, setEventDate] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
@@ -43,11 +51,20 @@ export function TeamsPage() {
       setLoading(true);
       setError(null);
       try {
-        const event = await apiRequest<{ date: string }>(`/events/${id}`, {}, token);
-        const response = await apiRequest<TeamResponse>(`/events/${id}/teams`, {}, token);
+        const dashboard = await apiRequest<DashboardResponse>(`/events/${id}/dashboard`, {}, token);
         if (mounted) {
-          setEventDate(event.date);
-          setData(response);
+          setEventDate(dashboard.event.date);
+          setData(dashboard.teams);
+          if (!dashboard.teams) {
+            const progress = dashboard.progress;
+            setError(
+              dashboard.teams_error
+                ? `Takımlar oluşturulamadı: ${dashboard.teams_error}`
+                : progress
+                  ? `Tamamlanan oylar: ${progress.completed_voters}/${progress.required_voters}. Takımlar henüz oluşturulamıyor.`
+                  : "Katılımcılar henüz belirlenmedi."
+            );
+          }
         }
       } catch (err) {
         if (mounted) {
@@ -66,6 +83,22 @@ export function TeamsPage() {
     };
   }, [id, token]);
 
+  const handleGenerate = async () => {
+    if (!id) {
+      return;
+    }
+    setGenerating(true);
+    setError(null);
+    try {
+      const teams = await apiRequest<TeamResponse>(`/events/${id}/teams:generate`, { method: "POST" }, token);
+      setData(teams);
+    } catch (err) {
+      setError((err as Error).message);
+    } finally {
+      setGenerating(false);
+    }
+  };
+
   if (loading) {
     return <p className="text-steel/70">Takımlar oluşturuluyor...</p>;
   }
@@ -104,9 +137,21 @@ export function TeamsPage() {
             </p>
           ) : null}
         </div>
-        <div className="rounded-2xl bg-white/70 px-4 py-2 text-sm text-steel shadow-glow">
-          Cinsiyet dengesi: {data.summary.team_a.gender_counts.M}M/
-          {data.summary.team_a.gender_counts.F}F
+        <div className="flex flex-wrap items-center gap-3">
+          <div className="rounded-2xl bg-white/70 px-4 py-2 text-sm text-steel shadow-glow">
+            Cinsiyet dengesi: {data.summary.team_a.gender_counts.M}M/
+            {data.summary.team_a.gender_counts.F}F
+          </div>
+          {isAdmin ? (
+            <button
+              type="button"
+              onClick={handleGenerate}
+              disabled={generating}
+              className="rounded-full bg-steel px-5 py-2 text-sm font-semibold text-white shadow-glow transition hover:bg-steel/90"
+            >
+              {generating ? "Oluşturuluyor..." : "Takımları yeniden oluştur"}
+            </button>
+          ) : null}
         </div>
       </div>
 
@@ -1,7 +1,7 @@
 ﻿import { FormEvent, useEffect, useState } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 
-import { apiRequest } from "../api";
+import { API_BASE, apiRequest } from "../api";
 import { GenderBadge } from "../components/GenderBadge";
 import { useAuth } from "../context/AuthContext";
 
@@ -11,6 +11,12 @@ type UserItem = {
   gender: "M" | "F";
 };
 
+type DashboardResponse = {
+  participants: UserItem[];
+  my_votes: { target_user_id: string; score: number }[];
+  progress: { completed_voters: number; required_voters: number } | null;
+};
+
 export function VotePage() {
   const { id } = useParams();
   const navigate = useNavigate();
@@ -32,15 +38,21 @@ export function VotePage() {
       setLoading(true);
       setError(null);
       try {
-        const data = await apiRequest<UserItem[]>(`/events/${id}/participants`, {}, token);
-        const filtered = data.filter((user) => user.id !== userId);
+        const data = await apiRequest<DashboardResponse>(`/events/${id}/dashboard`, {}, token);
+        const filtered = data.participants.filter((user) => user.id !== userId);
         if (mounted) {
           setUsers(filtered);
           const defaults: Record<string, number> = {};
           filtered.forEach((user) => {
             defaults[user.id] = 5;
           });
+          data.my_votes.forEach((vote) => {
+            defaults[vote.target_user_id] = vote.score;
+          });
           setScores(defaults);
+          if (data.progress) {
+            setProgress({ completed: data.progress.completed_voters, required: data.progress.required_voters });
+          }
         }
       } catch (err) {
         if (mounted) {
@@ -77,17 +89,64 @@ export function VotePage() {
 
   useEffect(() => {
     let mounted = true;
+    let interval: ReturnType<typeof setInterval> | null = null;
     const refresh = async () => {
       if (!mounted) {
         return;
       }
       await loadProgress();
     };
-    refresh();
-    const interval = setInterval(refresh, 5000);
+    const startPolling = () => {
+      if (interval === null) {
+        refresh();
+        interval = setInterval(refresh, 5000);
+      }
+    };
+
+    let source: EventSource | null = null;
+    const openStream = async () => {
+      try {
+        // EventSource can only pass credentials in the URL, so it gets a short-lived stream token.
+        const { token: streamToken } = await apiRequest<{ token: string }>(
+          `/events/${id}/progress/stream-token`,
+          { method: "POST" },
+          token
+        );
+        if (!mounted) {
+          return;
+        }
+        source = new EventSource(
+          `${API_BASE}/events/${id}/progress/stream?token=${encodeURIComponent(streamToken)}`
+        );
+        source.addEventListener("progress", (message) => {
+          const data = JSON.parse((message as MessageEvent).data) as {
+            completed_voters: number;
+            required_voters: number;
+          };
+          if (mounted) {
+            setProgress({ completed: data.completed_voters, required: data.required_voters });
+          }
+        });
+        source.onerror = () => {
+          source?.close();
+          startPolling();
+        };
+      } catch {
+        startPolling();
+      }
+    };
+    if (id && token && typeof EventSource !== "undefined") {
+      openStream();
+    } else {
+      startPolling();
+    }
+
     return () => {
       mounted = false;
-      clearInterval(interval);
+      source?.close();
+      if (interval !== null) {
+        clearInterval(interval);
+      }
     };
   }, [id, token]);
 
@@ -99,19 +158,19 @@ export function VotePage() {
     setSubmitting(true);
     setError(null);
     try {
-      for (const user of users) {
-        await apiRequest(
-          `/events/${id}/votes`,
-          {
-            method: "POST",
-            body: JSON.stringify({
+      await apiRequest(
+        `/events/${id}/votes:batch?upsert=true`,
+        {
+          method: "POST",
+          body: JSON.stringify({
+            votes: users.map((user) => ({
               target_user_id: user.id,
               score: scores[user.id] || 5
-            })
-          },
-          token
-        );
-      }
+            }))
+          })
+        },
+        token
+      );
       await loadProgress();
       navigate(`/events/${id}/teams`);
     } catch (err) {
@@ -0,0 +1,89 @@
+"""Print the query plans of the API's hot queries against ``DATABASE_URL``.
+
+Run from the repository root after migrating, ideally on a database with real data::
+
+    DATABASE_URL=postgresql://... python scripts/explain_queries.py
+
+SQLite plans come from ``EXPLAIN QUERY PLAN`` and Postgres plans from ``EXPLAIN``. Look for
+``USING INDEX`` / ``USING COVERING INDEX`` (SQLite) or ``Index Scan`` / ``Index Only Scan``
+(Postgres) on the indexes named in the models rather than full table scans.
+"""
+
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, tuple_  # noqa: E402
+
+from api.app.db import engine  # noqa: E402
+from api.app.models import Event, EventParticipant, EventPlayerScore, User, Vote  # noqa: E402
+
+
+def _sample_ids() -> tuple[str, str]:
+    with engine.connect() as conn:
+        event_id = conn.scalar(select(Event.id).limit(1)) or "event-id"
+        user_id = conn.scalar(select(User.id).limit(1)) or "user-id"
+    return event_id, user_id
+
+
+def hot_queries(event_id: str, user_id: str) -> dict:
+    participants = [user_id, "other-user-id"]
+    return {
+        "list_events (admin page)": select(Event)
+        .where(tuple_(Event.date, Event.id) > tuple_(date(2025, 1, 2), "event-id"))
+        .order_by(Event.date, Event.id)
+        .limit(101),
+        "list_events (participant)": select(Event)
+        .join(EventParticipant, EventParticipant.event_id == Event.id)
+        .where(EventParticipant.user_id == user_id)
+        .where(Event.date >= date(2025, 1, 2))
+        .order_by(Event.date, Event.id)
+        .limit(101),
+        "list_users (page)": select(User)
+        .where(tuple_(User.username, User.id) > tuple_("m", "user-id"))
+        .order_by(User.username, User.id)
+        .limit(101),
+        "event access": select(Event, EventParticipant.user_id)
+        .outerjoin(EventParticipant, EventParticipant.event_id == Event.id)
+        .where(Event.id == event_id),
+        "votes already cast": select(Vote.target_user_id)
+        .where(Vote.event_id == event_id)
+        .where(Vote.voter_id == user_id),
+        "voter counts": select(Vote.voter_id, func.count())
+        .where(Vote.event_id == event_id)
+        .where(Vote.voter_id.in_(participants))
+        .group_by(Vote.voter_id),
+        "score rebuild": select(Vote.voter_id, Vote.target_user_id, Vote.score)
+        .where(Vote.event_id == event_id)
+        .where(Vote.target_user_id.in_(participants)),
+        "completed scores": select(User.id, User.username, EventPlayerScore.completed_score_sum)
+        .join(EventPlayerScore, EventPlayerScore.user_id == User.id)
+        .where(EventPlayerScore.event_id == event_id)
+        .where(EventPlayerScore.user_id.in_(participants))
+        .order_by(User.username),
+        "dashboard participants": select(User, Vote.score)
+        .outerjoin(
+            Vote,
+            (Vote.target_user_id == User.id) & (Vote.event_id == event_id) & (Vote.voter_id == user_id),
+        )
+        .where(User.id.in_(participants))
+        .order_by(User.username),
+    }
+
+
+def main() -> None:
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    event_id, user_id = _sample_ids()
+    with engine.connect() as conn:
+        for name, stmt in hot_queries(event_id, user_id).items():
+            sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            print(f"== {name}")
+            for row in conn.exec_driver_sql(prefix + sql):
+                print("   ", " | ".join(str(value) for value in row))
+            print()
+
+
+if __name__ == "__main__":
+    main()
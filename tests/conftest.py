@@ -7,7 +7,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from api.app.db import Base
-from api.app.deps import get_db
+from api.app.deps import get_db, get_read_db
 from api.index import app
 
 TEST_DATABASE_URL = "sqlite+pysqlite://"
@@ -37,6 +37,7 @@ def client():
             db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -1,4 +1,4 @@
-from .helpers import login_user
+from .helpers import auth_headers, login_user
 
 
 def test_login_creates_user(client):
@@ -11,3 +11,109 @@ def test_login_creates_user(client):
 def test_admin_detection(client):
     data = login_user(client, "Münevver", "F")
     assert data["is_admin"] is True
+
+
+def test_login_matches_closest_name_within_two_edits(client, monkeypatch):
+    admin = login_user(client, "Münevver", "F")
+    other = login_user(client, "Hüseyin", "M")
+    monkeypatch.setenv("ALLOW_SELF_REGISTER", "false")
+
+    assert client.post("/api/auth/login", json={"username": "munever"}).json()["user_id"] == admin["user_id"]
+    assert client.post("/api/auth/login", json={"username": "HUSEYN"}).json()["user_id"] == other["user_id"]
+    assert client.post("/api/auth/login", json={"username": "someone"}).status_code == 404
+
+
+def test_login_finds_renamed_users_by_their_new_name(client, monkeypatch):
+    from sqlalchemy import update
+
+    from api.app import user_index
+    from api.app.models import User
+
+    from .conftest import TestingSessionLocal
+
+    alex = login_user(client, "alex", "M")
+    monkeypatch.setenv("ALLOW_SELF_REGISTER", "false")
+    monkeypatch.setattr(user_index, "FORCED_REBUILD_SECONDS", 0)
+    with TestingSessionLocal() as db:
+        db.get(User, alex["user_id"]).username = "zeynep"
+        db.commit()
+
+    assert client.post("/api/auth/login", json={"username": "zeynep"}).json()["user_id"] == alex["user_id"]
+    assert client.post("/api/auth/login", json={"username": "alex"}).status_code == 404
+
+    # A rename this process never saw, as done by another instance.
+    with TestingSessionLocal() as db:
+        db.execute(update(User).where(User.id == alex["user_id"]).values(username="selin"))
+        db.commit()
+    assert client.post("/api/auth/login", json={"username": "zeynep"}).status_code == 404
+    assert client.post("/api/auth/login", json={"username": "selin"}).json()["user_id"] == alex["user_id"]
+
+    # Right after a rebuild, misses do not rescan the users table; the next window catches up.
+    monkeypatch.setattr(user_index, "FORCED_REBUILD_SECONDS", 3600)
+    with TestingSessionLocal() as db:
+        db.execute(update(User).where(User.id == alex["user_id"]).values(username="deniz"))
+        db.commit()
+    rebuilt_at = user_index.user_index.rebuilt_at
+    for _ in range(3):
+        assert client.post("/api/auth/login", json={"username": "deniz"}).status_code == 404
+    assert user_index.user_index.rebuilt_at == rebuilt_at
+    monkeypatch.setattr(user_index, "FORCED_REBUILD_SECONDS", 0)
+    assert client.post("/api/auth/login", json={"username": "deniz"}).json()["user_id"] == alex["user_id"]
+
+
+def test_bounded_levenshtein_matches_full_distance():
+    from api.app.utils import levenshtein
+
+    assert levenshtein("kitten", "sitting") == 3
+    assert levenshtein("kitten", "sitting", max_distance=3) == 3
+    assert levenshtein("kitten", "sitting", max_distance=2) == 3
+    assert levenshtein("abc", "abcdef", max_distance=2) == 3
+    assert levenshtein("", "ab", max_distance=2) == 2
+
+
+def test_token_claims_authenticate_without_loading_the_user(client):
+    from sqlalchemy import event
+
+    from .conftest import engine
+
+    data = login_user(client, "Münevver", "F")
+    headers = auth_headers(data["access_token"])
+    assert client.get("/api/users", headers=headers).status_code == 200
+
+    statements: list[str] = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert client.get("/api/users", headers=headers).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 1
+
+
+def test_rename_and_revocation_retire_tokens(client):
+    from api.app.models import User
+    from api.app.principal import revoke_tokens
+
+    from .conftest import TestingSessionLocal
+
+    data = login_user(client, "alex", "M")
+    headers = auth_headers(data["access_token"])
+    assert client.get("/api/events", headers=headers).status_code == 200
+
+    with TestingSessionLocal() as db:
+        db.get(User, data["user_id"]).username = "alexander"
+        db.commit()
+    response = client.get("/api/events", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revoked"
+
+    fresh = login_user(client, "alexander", "M")
+    headers = auth_headers(fresh["access_token"])
+    assert client.get("/api/events", headers=headers).status_code == 200
+    with TestingSessionLocal() as db:
+        revoke_tokens(db, data["user_id"])
+        db.commit()
+    assert client.get("/api/events", headers=headers).status_code == 401
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from .helpers import auth_headers, create_event, create_users, login_user
+
+
+def _thursdays(start: date, count: int) -> list[str]:
+    first = start + timedelta(days=(3 - start.weekday()) % 7)
+    return [(first + timedelta(weeks=week)).isoformat() for week in range(count)]
+
+
+def test_events_are_paged_by_cursor_and_filtered_by_date(client):
+    admin = login_user(client, "Münevver", "F")
+    headers = auth_headers(admin["access_token"])
+    dates = _thursdays(date(2025, 1, 1), 5)
+    for value in dates:
+        create_event(client, admin["access_token"], value)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/events", params=params, headers=headers)
+        assert response.status_code == 200
+        seen.extend(event["date"] for event in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == dates
+
+    ranged = client.get("/api/events", params={"from": dates[1], "to": dates[3]}, headers=headers).json()
+    assert [event["date"] for event in ranged] == dates[1:4]
+    assert client.get("/api/events", params={"upcoming": True}, headers=headers).json() == []
+    assert client.get("/api/events", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
+
+
+def test_users_are_paged_by_username(client):
+    admin = login_user(client, "Münevver", "F")
+    create_users(client, [("carol", "F"), ("alice", "F"), ("bob", "M")])
+    headers = auth_headers(admin["access_token"])
+
+    first = client.get("/api/users", params={"limit": 2}, headers=headers)
+    second = client.get(
+        "/api/users", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}, headers=headers
+    )
+    assert [user["username"] for user in first.json() + second.json()] == ["Münevver", "alice", "bob", "carol"]
+    assert "X-Next-Cursor" not in second.headers
@@ -42,3 +42,142 @@ def test_average_scores(client):
     assert data["alpha"] == 4.5
     assert data["bravo"] == 6.5
     assert data["charlie"] == 9.0
+
+
+def test_score_aggregates_match_rebuild_from_votes(client):
+    from sqlalchemy import select
+
+    from api.app.aggregates import rebuild_event_aggregates
+    from api.app.models import EventPlayerScore, EventProgress, EventVoterProgress
+
+    from .conftest import TestingSessionLocal
+
+    admin = login_user(client, "Münevver", "F")
+    users = create_users(client, [("alpha", "M"), ("bravo", "F"), ("charlie", "M"), ("delta", "F")])
+    event_id = create_event(client, admin["access_token"])
+    set_participants(client, admin["access_token"], event_id, [data["user_id"] for data in users.values()])
+
+    for index, (voter, voter_data) in enumerate(users.items()):
+        targets = [data for name, data in users.items() if name != voter]
+        if voter == "delta":
+            targets = targets[:1]
+        for target in targets:
+            response = client.post(
+                f"/api/events/{event_id}/votes",
+                json={"target_user_id": target["user_id"], "score": 3 + index},
+                headers=auth_headers(voter_data["access_token"]),
+            )
+            assert response.status_code == 201
+
+    def snapshot(db):
+        scores = db.scalars(select(EventPlayerScore).where(EventPlayerScore.event_id == event_id)).all()
+        voters = db.scalars(select(EventVoterProgress).where(EventVoterProgress.event_id == event_id)).all()
+        progress = db.get(EventProgress, event_id)
+        return (
+            sorted(
+                (row.user_id, row.score_sum, row.vote_count, row.completed_score_sum, row.completed_vote_count)
+                for row in scores
+            ),
+            sorted((row.voter_id, row.vote_count, row.completed) for row in voters),
+            (progress.participant_count, progress.completed_voters),
+        )
+
+    with TestingSessionLocal() as db:
+        incremental = snapshot(db)
+        rebuild_event_aggregates(db, event_id)
+        db.expire_all()
+        assert snapshot(db) == incremental
+        assert sum(row[4] for row in incremental[0]) == 9
+        assert incremental[2] == (4, 3)
+
+    response = client.get(
+        f"/api/events/{event_id}/progress",
+        headers=auth_headers(users["alpha"]["access_token"]),
+    )
+    assert response.json()["completed_voters"] == 3
+
+
+def test_vote_upsert_rescores_and_keeps_aggregates(client):
+    from sqlalchemy import select
+
+    from api.app.aggregates import rebuild_event_aggregates
+    from api.app.models import EventPlayerScore
+
+    from .conftest import TestingSessionLocal
+
+    admin = login_user(client, "Münevver", "F")
+    users = create_users(client, [("alpha", "M"), ("bravo", "F"), ("charlie", "M")])
+    event_id = create_event(client, admin["access_token"])
+    set_participants(client, admin["access_token"], event_id, [data["user_id"] for data in users.values()])
+    headers = auth_headers(users["alpha"]["access_token"])
+    bravo, charlie = users["bravo"]["user_id"], users["charlie"]["user_id"]
+
+    response = client.post(
+        f"/api/events/{event_id}/votes?upsert=true", json={"target_user_id": bravo, "score": 4}, headers=headers
+    )
+    assert response.status_code == 201
+    assert response.json()["result"] == "created"
+    response = client.post(
+        f"/api/events/{event_id}/votes?upsert=true", json={"target_user_id": bravo, "score": 9}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["result"] == "updated"
+
+    response = client.post(
+        f"/api/events/{event_id}/votes:batch?upsert=true",
+        json={"votes": [{"target_user_id": bravo, "score": 2}, {"target_user_id": charlie, "score": 6}]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["updated"]) == (1, 1)
+    assert [item["status"] for item in body["results"]] == ["updated", "created"]
+
+    def snapshot(db):
+        rows = db.scalars(select(EventPlayerScore).where(EventPlayerScore.event_id == event_id)).all()
+        return sorted(
+            (row.user_id, row.score_sum, row.vote_count, row.completed_score_sum, row.completed_vote_count)
+            for row in rows
+        )
+
+    with TestingSessionLocal() as db:
+        incremental = snapshot(db)
+        assert {row[0]: row[1:3] for row in incremental}[bravo] == (2, 1)
+        rebuild_event_aggregates(db, event_id)
+        db.expire_all()
+        assert snapshot(db) == incremental
+
+
+def test_scores_etag_changes_with_vote_version(client):
+    admin = login_user(client, "Münevver", "F")
+    users = create_users(client, [("alpha", "M"), ("bravo", "F"), ("charlie", "M")])
+    event_id = create_event(client, admin["access_token"])
+    user_ids = [users["alpha"]["user_id"], users["bravo"]["user_id"]]
+    set_participants(client, admin["access_token"], event_id, user_ids)
+    for voter, target in (("alpha", "bravo"), ("bravo", "alpha")):
+        response = client.post(
+            f"/api/events/{event_id}/votes",
+            json={"target_user_id": users[target]["user_id"], "score": 7},
+            headers=auth_headers(users[voter]["access_token"]),
+        )
+        assert response.status_code == 201
+
+    headers = auth_headers(users["alpha"]["access_token"])
+    first = client.get(f"/api/events/{event_id}/scores", headers=headers)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    cached = client.get(f"/api/events/{event_id}/scores", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    set_participants(client, admin["access_token"], event_id, user_ids)
+    unchanged = client.get(f"/api/events/{event_id}/scores", headers={**headers, "If-None-Match": etag})
+    assert unchanged.status_code == 304
+
+    set_participants(client, admin["access_token"], event_id, [*user_ids, users["charlie"]["user_id"]])
+    set_participants(client, admin["access_token"], event_id, user_ids)
+    refreshed = client.get(f"/api/events/{event_id}/scores", headers={**headers, "If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+    assert refreshed.json() == first.json()
@@ -1,6 +1,77 @@
+import itertools
+import random
+import time
+
+import pytest
+
+from api.app import teams
+from api.app.routers import events
+from api.app.teams import (
+    PlayerScore,
+    TeamState,
+    _objective,
+    _vectorized_swap_optimization,
+    generate_balanced_teams,
+    generate_multi_teams,
+    solve_exact_teams,
+)
+
 from .helpers import auth_headers, create_event, create_users, login_user, set_participants
 
 
+def _random_roster(n: int, seed: int) -> list[PlayerScore]:
+    """``n`` players alternating M/F with seeded random average scores."""
+    rng = random.Random(seed)
+    return [
+        PlayerScore(user_id=f"u{i}", username=f"p{i}", gender="M" if i % 2 else "F", average_score=rng.uniform(1, 10))
+        for i in range(n)
+    ]
+
+
+def _vote_full_event(client):
+    users = [
+        ("player01", "M"), ("player02", "M"), ("player03", "M"), ("player04", "M"), ("player05", "M"), ("player06", "M"),
+        ("player07", "F"), ("player08", "F"), ("player09", "F"), ("player10", "F"), ("player11", "F"), ("player12", "F"),
+    ]
+    admin = login_user(client, "Münevver", "F")
+    tokens = create_users(client, users)
+    event_id = create_event(client, admin["access_token"])
+    set_participants(
+        client,
+        admin["access_token"],
+        event_id,
+        [tokens[name]["user_id"] for name, _ in users],
+    )
+    id_map = {name: data["user_id"] for name, data in tokens.items()}
+
+    target_scores = {
+        "player01": 10,
+        "player02": 9,
+        "player03": 8,
+        "player04": 7,
+        "player05": 6,
+        "player06": 5,
+        "player07": 4,
+        "player08": 3,
+        "player09": 2,
+        "player10": 1,
+        "player11": 10,
+        "player12": 9,
+    }
+
+    for voter_name, _ in users:
+        for target_name, _ in users:
+            if voter_name == target_name:
+                continue
+            response = client.post(
+                f"/api/events/{event_id}/votes",
+                json={"target_user_id": id_map[target_name], "score": target_scores[target_name]},
+                headers=auth_headers(tokens[voter_name]["access_token"]),
+            )
+            assert response.status_code == 201
+    return tokens, event_id
+
+
 def test_team_generation_balances_score_and_gender(client):
     users = [
         ("player01", "M"), ("player02", "M"), ("player03", "M"), ("player04", "M"), ("player05", "M"), ("player06", "M"),
@@ -71,3 +142,255 @@ def test_team_generation_balances_score_and_gender(client):
     total_a = sum(player["average_score"] for player in team_a)
     total_b = sum(player["average_score"] for player in team_b)
     assert abs(total_a - total_b) <= 5
+
+
+def test_exact_mode_is_never_worse_than_heuristic(client, monkeypatch):
+    tokens, event_id = _vote_full_event(client)
+    headers = auth_headers(tokens["player01"]["access_token"])
+
+    heuristic = client.get(f"/api/events/{event_id}/teams", headers=headers).json()
+    response = client.get(f"/api/events/{event_id}/teams?mode=exact", headers=headers)
+    assert response.status_code == 200
+    exact = response.json()
+
+    assert exact["mode"] == "exact"
+    assert exact["optimal"] is True
+    assert response.headers["ETag"]
+    assert exact["objective"] <= heuristic["objective"]
+    assert len(exact["team_a"]) == len(exact["team_b"]) == 6
+
+    # A search cut short by the time budget depends on timing, so it is neither cached nor tagged.
+    client.post(
+        f"/api/events/{event_id}/votes?upsert=true",
+        json={"target_user_id": tokens["player02"]["user_id"], "score": 2},
+        headers=headers,
+    )
+    monkeypatch.setattr(events, "_solver_time_budget", lambda: 0.0)
+    for _ in range(2):
+        cut_short = client.get(f"/api/events/{event_id}/teams?mode=exact", headers=headers)
+        assert cut_short.json()["optimal"] is False
+        assert "ETag" not in cut_short.headers
+
+
+def test_team_state_scores_match_full_objective():
+    players = _random_roster(40, seed=7)
+    state = TeamState(team_a=players[:20], team_b=players[20:])
+    for i, j in [(0, 0), (3, 17), (19, 5)]:
+        swapped_a = state.team_a[:]
+        swapped_b = state.team_b[:]
+        swapped_a[i], swapped_b[j] = swapped_b[j], swapped_a[i]
+        assert abs(state.swap_cost(i, j) - _objective(swapped_a, swapped_b)) < 1e-9
+    assert abs(state.add_cost(players[0], to_a=False) - _objective(state.team_a, state.team_b + [players[0]])) < 1e-9
+
+    result = generate_balanced_teams(players)
+    assert sorted(p.user_id for p in result.team_a + result.team_b) == sorted(p.user_id for p in players)
+
+
+def test_exact_solver_matches_brute_force_and_keeps_its_deadline(monkeypatch):
+    players = _random_roster(14, seed=5)
+    brute = min(
+        _objective([players[i] for i in combo], [p for i, p in enumerate(players) if i not in combo])
+        for combo in itertools.combinations(range(14), 7)
+    )
+    vectorized = solve_exact_teams(players)
+    monkeypatch.setattr(teams, "_numpy", lambda: None)
+    pure = solve_exact_teams(players)
+    assert vectorized.optimal and pure.optimal
+    assert abs(vectorized.objective - brute) < 1e-9
+    assert abs(pure.objective - brute) < 1e-9
+
+    # The pure-Python enumeration of a 40-player roster takes seconds; the deadline cuts it short.
+    large = _random_roster(40, seed=6)
+    started = time.monotonic()
+    result = solve_exact_teams(large, time_budget=0.2)
+    assert time.monotonic() - started < 1.0
+    assert result.optimal is False
+
+
+def test_multi_team_generation_balances_all_teams():
+    players = _random_roster(48, seed=3)
+    result = generate_multi_teams(players, 4)
+
+    assert [len(team) for team in result.teams] == [12, 12, 12, 12]
+    assert sorted(p.user_id for team in result.teams for p in team) == sorted(p.user_id for p in players)
+    assert all(sum(1 for p in team if p.gender == "M") == 6 for team in result.teams)
+    totals = [sum(p.average_score for p in team) for team in result.teams]
+    assert max(totals) - min(totals) < 1
+
+
+def test_multi_team_endpoint_requires_enough_players(client):
+    tokens, event_id = _vote_full_event(client)
+    response = client.get(
+        f"/api/events/{event_id}/teams?teams=3",
+        headers=auth_headers(tokens["player01"]["access_token"]),
+    )
+    assert response.status_code == 400
+
+    response = client.get(
+        f"/api/events/{event_id}/teams?teams=2",
+        headers=auth_headers(tokens["player01"]["access_token"]),
+    )
+    data = response.json()
+    assert len(data["teams"]) == 2
+    assert set(data["summary"]) == {"team_a", "team_b"}
+
+
+def test_vectorized_swap_search_reaches_local_optimum():
+    pytest.importorskip("numpy")
+    players = _random_roster(60, seed=11)
+    state = TeamState(team_a=players[:30], team_b=players[30:])
+    _vectorized_swap_optimization(state)
+
+    current = state.objective()
+    assert all(
+        state.swap_cost(i, j) + 0.01 >= current
+        for i in range(len(state.team_a))
+        for j in range(len(state.team_b))
+    )
+    assert sorted(p.user_id for p in state.team_a + state.team_b) == sorted(p.user_id for p in players)
+
+
+def test_restarts_are_reproducible_and_reported(client):
+    tokens, event_id = _vote_full_event(client)
+    headers = auth_headers(tokens["player01"]["access_token"])
+
+    baseline = client.get(f"/api/events/{event_id}/teams", headers=headers).json()
+    first = client.get(f"/api/events/{event_id}/teams?restarts=8&seed=42", headers=headers).json()
+    second = client.get(f"/api/events/{event_id}/teams?restarts=8&seed=42", headers=headers).json()
+
+    assert baseline["search"] is None
+    assert first["search"]["seed"] == 42
+    assert first["search"]["restarts"] == 8
+    assert first["objective"] <= baseline["objective"]
+    assert first["search"]["best_objective"] <= first["search"]["median_objective"]
+    assert [p["user_id"] for p in first["team_a"]] == [p["user_id"] for p in second["team_a"]]
+
+    # Without a seed each request draws its own, so the split is not cached or tagged.
+    unseeded = [client.get(f"/api/events/{event_id}/teams?restarts=8", headers=headers) for _ in range(2)]
+    assert all("ETag" not in r.headers for r in unseeded)
+    assert unseeded[0].json()["search"]["seed"] != unseeded[1].json()["search"]["seed"]
+
+
+def test_alternatives_are_distinct_and_ranked(client):
+    tokens, event_id = _vote_full_event(client)
+    response = client.get(
+        f"/api/events/{event_id}/teams?alternatives=4",
+        headers=auth_headers(tokens["player01"]["access_token"]),
+    )
+    assert response.status_code == 200
+    alternatives = response.json()["alternatives"]
+
+    assert len(alternatives) == 4
+    objectives = [item["objective"] for item in alternatives]
+    assert objectives == sorted(objectives)
+    splits = {frozenset(p["user_id"] for p in item["team_a"]) for item in alternatives}
+    splits |= {frozenset(p["user_id"] for p in item["team_b"]) for item in alternatives}
+    assert len(splits) == 8
+
+
+def test_dashboard_bundles_event_votes_progress_and_results(client):
+    admin = login_user(client, "Münevver", "F")
+    players = create_users(client, [("player1", "M"), ("player2", "F"), ("player3", "M")])
+    event_id = create_event(client, admin["access_token"])
+    set_participants(client, admin["access_token"], event_id, [data["user_id"] for data in players.values()])
+    headers = auth_headers(players["player1"]["access_token"])
+    client.post(
+        f"/api/events/{event_id}/votes",
+        json={"target_user_id": players["player2"]["user_id"], "score": 6},
+        headers=headers,
+    )
+
+    early = client.get(f"/api/events/{event_id}/dashboard", headers=headers).json()
+    assert early["event"]["id"] == event_id
+    assert [user["username"] for user in early["participants"]] == ["player1", "player2", "player3"]
+    assert early["my_votes"] == [{"target_user_id": players["player2"]["user_id"], "score": 6}]
+    assert early["progress"]["completed_voters"] == 0
+    assert early["scores"] is None and early["teams"] is None
+
+    # With an odd number of finished voters the dashboard says why it has no teams.
+    for voter in ("player2", "player3"):
+        for target in ("player1", "player2", "player3"):
+            if target != voter:
+                client.post(
+                    f"/api/events/{event_id}/votes",
+                    json={"target_user_id": players[target]["user_id"], "score": 5},
+                    headers=auth_headers(players[voter]["access_token"]),
+                )
+    client.post(
+        f"/api/events/{event_id}/votes",
+        json={"target_user_id": players["player3"]["user_id"], "score": 4},
+        headers=headers,
+    )
+    odd = client.get(f"/api/events/{event_id}/dashboard", headers=headers).json()
+    assert odd["progress"]["can_show_results"] is True
+    assert odd["teams"] is None
+    assert odd["teams_error"] == "Completed voter count must be even to split teams evenly"
+
+    tokens, full_event_id = _vote_full_event(client)
+    headers = auth_headers(tokens["player01"]["access_token"])
+    dashboard = client.get(f"/api/events/{full_event_id}/dashboard", headers=headers).json()
+    assert dashboard["progress"]["can_show_results"] is True
+    assert len(dashboard["my_votes"]) == 11
+    assert dashboard["scores"] == client.get(f"/api/events/{full_event_id}/scores", headers=headers).json()
+    assert dashboard["teams"] == client.get(f"/api/events/{full_event_id}/teams", headers=headers).json()
+    assert dashboard["teams_error"] is None
+
+
+def test_generated_teams_are_pinned_until_regenerated(client):
+    tokens, event_id = _vote_full_event(client)
+    admin_token = login_user(client, "Münevver", "F")["access_token"]
+    admin = auth_headers(admin_token)
+    headers = auth_headers(tokens["player01"]["access_token"])
+    forbidden = client.post(f"/api/events/{event_id}/teams:generate", headers=headers)
+    assert forbidden.status_code == 403
+    for seed in (-1, 2**31):
+        rejected = client.post(f"/api/events/{event_id}/teams:generate?restarts=4&seed={seed}", headers=admin)
+        assert rejected.status_code == 422
+        assert client.get(f"/api/events/{event_id}/teams?seed={seed}", headers=headers).status_code == 422
+
+    generated = client.post(f"/api/events/{event_id}/teams:generate?restarts=4", headers=admin).json()
+    pinned = client.get(f"/api/events/{event_id}/teams", headers=headers)
+    assert pinned.json() == generated
+    assert generated["generated_at"] is not None
+    assert client.get(
+        f"/api/events/{event_id}/teams", headers={**headers, "If-None-Match": pinned.headers["ETag"]}
+    ).status_code == 304
+
+    # The stored seed replays the pinned split as a fresh, unpinned preview.
+    seed = generated["search"]["seed"]
+    replay = client.get(f"/api/events/{event_id}/teams?restarts=4&seed={seed}", headers=headers).json()
+    assert replay["generated_at"] is None
+    assert replay["teams"] == generated["teams"]
+
+    # A re-score moves the live split's inputs but not the pinned teams.
+    client.post(
+        f"/api/events/{event_id}/votes?upsert=true",
+        json={"target_user_id": tokens["player02"]["user_id"], "score": 1},
+        headers=headers,
+    )
+    assert client.get(f"/api/events/{event_id}/teams", headers=headers).json() == generated
+    assert client.get(f"/api/events/{event_id}/dashboard", headers=headers).json()["teams"] == generated
+
+    regenerated = client.post(f"/api/events/{event_id}/teams:generate", headers=admin).json()
+    assert regenerated["vote_version"] > generated["vote_version"]
+    assert client.get(f"/api/events/{event_id}/teams", headers=headers).json() == regenerated
+
+    # A roster change unpins the split, which would keep the removed players; the ten left
+    # are too few for a fresh one.
+    kept = [data["user_id"] for name, data in tokens.items() if name not in ("player11", "player12")]
+    set_participants(client, admin_token, event_id, kept)
+    assert client.get(f"/api/events/{event_id}/teams", headers=headers).status_code == 400
+
+
+def test_large_restart_searches_share_one_process_pool():
+    players = _random_roster(40, seed=11)
+    in_process = generate_balanced_teams(players, restarts=64, seed=3, workers=1)
+    assert teams._pool is None
+
+    pooled = generate_balanced_teams(players, restarts=64, seed=3, workers=2)
+    pool = teams._pool
+    again = generate_balanced_teams(players, restarts=64, seed=3, workers=2)
+    assert teams._pool is pool
+    for result in (pooled, again):
+        assert result.stats.restarts == 64
+        assert abs(result.objective - in_process.objective) < 1e-9
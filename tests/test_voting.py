@@ -53,3 +53,257 @@ def test_voting_allows_other_users(client):
         headers=auth_headers(token),
     )
     assert duplicate.status_code == 409
+
+
+def test_batch_vote_reports_per_item_results(client):
+    admin = login_user(client, "Münevver", "F")
+    users = create_users(
+        client,
+        [("batch1", "M"), ("batch2", "F"), ("batch3", "M"), ("outsider", "F")],
+    )
+    event_id = create_event(client, admin["access_token"])
+    set_participants(
+        client,
+        admin["access_token"],
+        event_id,
+        [users["batch1"]["user_id"], users["batch2"]["user_id"], users["batch3"]["user_id"]],
+    )
+    headers = auth_headers(users["batch1"]["access_token"])
+
+    response = client.post(
+        f"/api/events/{event_id}/votes",
+        json={"target_user_id": users["batch2"]["user_id"], "score": 7},
+        headers=headers,
+    )
+    assert response.status_code == 201
+
+    response = client.post(
+        f"/api/events/{event_id}/votes:batch",
+        json={
+            "votes": [
+                {"target_user_id": users["batch2"]["user_id"], "score": 5},
+                {"target_user_id": users["batch3"]["user_id"], "score": 8},
+                {"target_user_id": users["batch1"]["user_id"], "score": 8},
+                {"target_user_id": users["outsider"]["user_id"], "score": 8},
+            ]
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert [item["status"] for item in data["results"]] == ["duplicate", "created", "rejected", "rejected"]
+
+    progress = client.get(f"/api/events/{event_id}/progress", headers=headers)
+    assert progress.json()["completed_voters"] == 1
+
+
+def test_progress_stream_requires_membership(client):
+    admin = login_user(client, "Münevver", "F")
+    users = create_users(client, [("stream1", "M"), ("stream2", "F"), ("stranger", "M")])
+    event_id = create_event(client, admin["access_token"])
+    set_participants(
+        client,
+        admin["access_token"],
+        event_id,
+        [users["stream1"]["user_id"], users["stream2"]["user_id"]],
+    )
+
+    assert client.get(f"/api/events/{event_id}/progress/stream").status_code == 401
+    stranger = auth_headers(users["stranger"]["access_token"])
+    assert client.post(f"/api/events/{event_id}/progress/stream-token", headers=stranger).status_code == 403
+
+    # Access tokens are not accepted in the URL, and stream tokens are not access tokens.
+    access_token = users["stream1"]["access_token"]
+    assert client.get(f"/api/events/{event_id}/progress/stream?token={access_token}").status_code == 401
+    issued = client.post(
+        f"/api/events/{event_id}/progress/stream-token", headers=auth_headers(access_token)
+    ).json()
+    assert issued["expires_in"] == 60
+    stream_token = issued["token"]
+    assert client.get(f"/api/events/{event_id}/progress", headers=auth_headers(stream_token)).status_code == 401
+    other_event = create_event(client, admin["access_token"], date="2026-01-01")
+    assert client.get(f"/api/events/{other_event}/progress/stream?token={stream_token}").status_code == 401
+
+
+def test_progress_notifier_fans_out_changes_only():
+    import asyncio
+    import threading
+
+    from api.app.notifier import ProgressNotifier
+
+    async def scenario():
+        notifier = ProgressNotifier()
+        initial = {"completed_voters": 0}
+        first = notifier.subscribe("event", initial)
+        second = notifier.subscribe("event", initial)
+
+        def publish():
+            notifier.publish("event", {"completed_voters": 0})
+            notifier.publish("event", {"completed_voters": 1})
+            notifier.publish("event", {"completed_voters": 1})
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+        thread.join()
+        received = [await asyncio.wait_for(queue.get(), timeout=1) for queue in (first, second)]
+        assert received == [{"completed_voters": 1}, {"completed_voters": 1}]
+        assert first.empty() and second.empty()
+
+        notifier.unsubscribe("event", first)
+        notifier.unsubscribe("event", second)
+        assert not notifier.has_subscribers("event")
+
+    asyncio.run(scenario())
+
+
+def test_progress_notifier_polls_each_event_once_per_tick():
+    import asyncio
+
+    from api.app.notifier import ProgressNotifier
+
+    async def scenario():
+        notifier = ProgressNotifier(poll_interval=0.01)
+        # Stands in for progress written by another instance, which never publishes here.
+        stored = {"completed_voters": 0}
+        polls = []
+
+        def poll():
+            polls.append(dict(stored))
+            return dict(stored)
+
+        first = notifier.subscribe("event", {"completed_voters": 0}, poll=poll)
+        second = notifier.subscribe("event", {"completed_voters": 0}, poll=poll)
+        stored["completed_voters"] = 2
+        received = [await asyncio.wait_for(queue.get(), timeout=1) for queue in (first, second)]
+        assert received == [{"completed_voters": 2}, {"completed_voters": 2}]
+
+        await asyncio.sleep(0.05)
+        assert first.empty() and second.empty()
+        ticks = len(polls)
+        notifier.unsubscribe("event", first)
+        notifier.unsubscribe("event", second)
+        await asyncio.sleep(0.05)
+        # One shared watcher while subscribed, none after the last subscriber leaves.
+        assert ticks <= 0.1 / 0.01 + 1
+        assert len(polls) <= ticks + 1
+
+    asyncio.run(scenario())
+
+
+def test_event_access_is_checked_with_one_query(client):
+    from sqlalchemy import event
+
+    from .conftest import engine
+
+    admin = login_user(client, "Münevver", "F")
+    users = create_users(client, [("player1", "M"), ("player2", "F"), ("outsider", "M")])
+    event_id = create_event(client, admin["access_token"])
+    set_participants(client, admin["access_token"], event_id, [users["player1"]["user_id"], users["player2"]["user_id"]])
+    member = auth_headers(users["player1"]["access_token"])
+    assert client.get(f"/api/events/{event_id}", headers=member).status_code == 200
+
+    statements: list[str] = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(f"/api/events/{event_id}", headers=member)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert response.json()["id"] == event_id
+    assert len(statements) == 1
+
+    outsider = auth_headers(users["outsider"]["access_token"])
+    assert client.get(f"/api/events/{event_id}/participants", headers=outsider).status_code == 403
+    assert client.get("/api/events/missing", headers=outsider).status_code == 404
+
+
+ASYNC_MODE_SCRIPT = """
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from api.index import app
+from tests.helpers import auth_headers, create_event, create_users, login_user, set_participants
+
+batch_route = next(route for route in app.routes if getattr(route, "path", "").endswith("/votes:batch"))
+assert inspect.iscoroutinefunction(batch_route.endpoint)
+
+with TestClient(app) as client:
+    admin = login_user(client, "Münevver", "F")
+    users = list(create_users(client, [("player1", "M"), ("player2", "F"), ("player3", "M")]).values())
+    event_id = create_event(client, admin["access_token"])
+    set_participants(client, admin["access_token"], event_id, [user["user_id"] for user in users])
+
+    def vote(voter):
+        votes = [
+            {"target_user_id": user["user_id"], "score": 7}
+            for user in users
+            if user["user_id"] != voter["user_id"]
+        ]
+        return client.post(
+            f"/api/events/{event_id}/votes:batch",
+            json={"votes": votes},
+            headers=auth_headers(voter["access_token"]),
+        ).json()["created"]
+
+    with ThreadPoolExecutor(len(users)) as pool:
+        assert list(pool.map(vote, users)) == [2, 2, 2]
+    assert client.get(f"/api/events/{event_id}", headers=auth_headers(users[0]["access_token"])).status_code == 200
+    progress = client.get(f"/api/events/{event_id}/progress", headers=auth_headers(admin["access_token"])).json()
+    assert progress["completed_voters"] == 3, progress
+    scores = client.get(f"/api/events/{event_id}/scores", headers=auth_headers(admin["access_token"])).json()
+    assert [score["average_score"] for score in scores] == [7.0, 7.0, 7.0]
+"""
+
+
+def test_async_database_mode_serves_votes(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'async.db'}",
+        "DATABASE_ASYNC": "true",
+        "SEED_USERS": "false",
+        "ALLOW_SELF_REGISTER": "true",
+        "MIN_VOTERS_FOR_RESULTS": "2",
+    }
+    result = subprocess.run([sys.executable, "-c", ASYNC_MODE_SCRIPT], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_removing_participants_clears_their_votes(client):
+    from sqlalchemy import select
+
+    from api.app.models import Vote
+
+    from .conftest import TestingSessionLocal
+
+    admin = login_user(client, "Münevver", "F")
+    users = create_users(client, [("player1", "M"), ("player2", "F"), ("player3", "M")])
+    ids = {name: data["user_id"] for name, data in users.items()}
+    event_id = create_event(client, admin["access_token"])
+    set_participants(client, admin["access_token"], event_id, list(ids.values()))
+    for voter in ids:
+        votes = [{"target_user_id": ids[target], "score": 5} for target in ids if target != voter]
+        client.post(
+            f"/api/events/{event_id}/votes:batch",
+            json={"votes": votes},
+            headers=auth_headers(users[voter]["access_token"]),
+        )
+
+    set_participants(client, admin["access_token"], event_id, [ids["player1"], ids["player2"]])
+    with TestingSessionLocal() as db:
+        remaining = db.execute(select(Vote.voter_id, Vote.target_user_id).where(Vote.event_id == event_id)).all()
+    assert sorted(remaining) == sorted([(ids["player1"], ids["player2"]), (ids["player2"], ids["player1"])])
+
+    progress = client.get(f"/api/events/{event_id}/progress", headers=auth_headers(admin["access_token"])).json()
+    assert progress["completed_voters"] == 2
+    scores = client.get(f"/api/events/{event_id}/scores", headers=auth_headers(admin["access_token"])).json()
+    assert [score["username"] for score in scores] == ["player1", "player2"]